@@ -1,7 +1,9 @@
 """Bot command handlers."""
-from typing import List
+from typing import List, Optional
 import os
+import copy
 import asyncio
+import threading
 
 from telegram import (
     Update, 
@@ -10,14 +12,21 @@ from telegram import (
 )
 from telegram.ext import ContextTypes
 
-from config.logging import configure_logger
+from config.logging import configure_logger, new_job_id
 from config.constants import (
     UNAUTHORIZED_MESSAGE, HELP_TEXT, CUT_USAGE, DOWNLOAD_USAGE,
     SELECT_COMMAND, TIME_ERROR, CUT_ERROR, DOWNLOAD_ERROR, CUTTING_VIDEO,
-    ENTER_END_TIME, PROCESSING_VIDEO
+    ENTER_END_TIME, PROMPT_EXPIRED, PROCESSING_VIDEO, PREPARING_JOB, JOB_QUEUED, STATS_TEXT,
+    TUNING_TEXT, TUNING_ERROR
 )
+from config.tuning import tuning
 from .utils import convert_to_seconds, extract_timestamp_from_url
 from .video_handler import VideoProcessor
+from .prefetch import prefetcher, extract_info
+from .pending import PendingCut, pending_store
+from .scheduler import Job, scheduler, estimate_job_cost
+from .resilience import extractor_breaker
+from .monitor import loop_monitor
 
 logger = configure_logger(__name__)
 
@@ -70,6 +79,109 @@ class CommandHandler:
         except ValueError as e:
             raise ValueError(TIME_ERROR.format(str(e)))
 
+    @classmethod
+    def queue_video_job(
+        cls,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        video_link: str,
+        error_template: str,
+        start_seconds: Optional[int] = None,
+        duration_seconds: Optional[int] = None,
+        prefetch_message_id: Optional[int] = None
+    ) -> None:
+        """Estimate job cost in the background and hand it to the scheduler.
+
+        Args:
+            update: Telegram update object
+            context: Bot context
+            video_link: URL of video to download
+            error_template: Message template for failures
+            start_seconds: Start time for video cutting
+            duration_seconds: Duration for video cutting
+            prefetch_message_id: Prompt message the prefetched info is keyed by
+        """
+        chat_id = update.message.chat_id
+
+        async def prepare_task():
+            try:
+                status_message = await update.message.reply_text(PREPARING_JOB)
+
+                info = None
+                if prefetch_message_id is not None:
+                    info = await prefetcher.take(chat_id, prefetch_message_id)
+                # No speculative extraction while the extractor is failing
+                if info is None and not extractor_breaker.is_open:
+                    try:
+                        loop = asyncio.get_running_loop()
+                        info = await loop.run_in_executor(None, extract_info, video_link)
+                    except Exception as e:
+                        # Download reports the actual error
+                        logger.warning(f"Cost estimation extraction failed: {e}")
+
+                async def run():
+                    # Bind before the preview task copies this context
+                    new_job_id()
+                    preview_task = None
+                    preview_abort = threading.Event()
+                    if VideoProcessor.wants_preview(info, duration_seconds):
+                        preview_task = asyncio.create_task(VideoProcessor.deliver_preview(
+                            update, context, video_link, start_seconds, duration_seconds,
+                            copy.deepcopy(info), preview_abort
+                        ))
+                    try:
+                        result = await VideoProcessor.download_video(
+                            update=update,
+                            context=context,
+                            video_link=video_link,
+                            start_time=None if start_seconds is None else str(start_seconds),
+                            duration_seconds=duration_seconds,
+                            info=info,
+                            status_message_id=status_message.message_id
+                        )
+                        if result.success:
+                            # A preview still in flight is pointless now; a failed download keeps it
+                            preview_message_id = None
+                            if preview_task is not None:
+                                if preview_task.done():
+                                    preview_message_id = preview_task.result()
+                                else:
+                                    preview_abort.set()
+                            await VideoProcessor.send_or_upload_video(
+                                result.file_path, update, context, result.status_message_id,
+                                replace_message_id=preview_message_id
+                            )
+                        else:
+                            await cls.send_error_message(
+                                update, error_template.format(result.error_message)
+                            )
+                    except Exception as e:
+                        await cls.send_error_message(update, error_template.format(str(e)))
+                    finally:
+                        # Returns once the preview thread has exited and its files are gone
+                        if preview_task is not None:
+                            await preview_task
+
+                async def on_queued(position: int, eta: float):
+                    try:
+                        await context.bot.edit_message_text(
+                            chat_id=chat_id,
+                            message_id=status_message.message_id,
+                            text=JOB_QUEUED.format(position, cls.format_duration(int(eta)))
+                        )
+                    except Exception as e:
+                        logger.debug(f"Queue position update failed: {e}")
+
+                scheduler.submit(Job(
+                    run=run,
+                    cost=estimate_job_cost(info, duration_seconds),
+                    on_queued=on_queued
+                ))
+            except Exception as e:
+                await cls.send_error_message(update, error_template.format(str(e)))
+
+        asyncio.create_task(prepare_task())
+
 class Commands:
     """Bot command implementations."""
 
@@ -80,6 +192,30 @@ class Commands:
             return
         await update.effective_message.reply_text(HELP_TEXT)
 
+    @staticmethod
+    async def stats(update: Update, _: ContextTypes.DEFAULT_TYPE) -> None:
+        """Send event loop stall statistics."""
+        if not await CommandHandler.check_auth(update):
+            return
+        await update.effective_message.reply_text(STATS_TEXT.format(**loop_monitor.snapshot()))
+
+    @staticmethod
+    async def tune(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Show the active tuning profile or reload with the given one."""
+        if not await CommandHandler.check_auth(update):
+            return
+
+        if context.args:
+            try:
+                tuning.reload(context.args[0])
+            except (OSError, ValueError) as e:
+                await update.effective_message.reply_text(TUNING_ERROR.format(str(e)))
+                return
+            scheduler.dispatch()
+
+        settings = "\n".join(f"{key}: {value}" for key, value in vars(tuning.current).items())
+        await update.effective_message.reply_text(TUNING_TEXT.format(tuning.name, settings))
+
     @staticmethod
     async def button(update: Update, _: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle button clicks."""
@@ -129,26 +265,11 @@ class Commands:
             )
 
             logger.info(f"Cut: {video_link}, start: {start_time}, duration: {duration_seconds}s")
-            
-            async def download_task():
-                try:
-                    result = await VideoProcessor.download_video(
-                        update=update,
-                        context=context,
-                        video_link=video_link,
-                        start_time=str(start_seconds),
-                        duration_seconds=duration_seconds
-                    )
-                    if result.success:
-                        await VideoProcessor.send_or_upload_video(result.file_path, update, context)
-                    else:
-                        await CommandHandler.send_error_message(
-                            update, CUT_ERROR.format(result.error_message)
-                        )
-                except Exception as e:
-                    await CommandHandler.send_error_message(update, CUT_ERROR.format(str(e)))
-
-            asyncio.create_task(download_task())
+            CommandHandler.queue_video_job(
+                update, context, video_link, CUT_ERROR,
+                start_seconds=start_seconds,
+                duration_seconds=duration_seconds
+            )
 
         except Exception as e:
             await CommandHandler.send_error_message(update, CUT_ERROR.format(str(e)))
@@ -179,25 +300,11 @@ class Commands:
                             CUTTING_VIDEO.format(start_time, end_time, duration_formatted)
                         )
 
-                        async def download_task():
-                            try:
-                                result = await VideoProcessor.download_video(
-                                    update=update,
-                                    context=context,
-                                    video_link=video_link,
-                                    start_time=str(start_seconds),
-                                    duration_seconds=duration_seconds
-                                )
-                                if result.success:
-                                    await VideoProcessor.send_or_upload_video(result.file_path, update, context)
-                                else:
-                                    await CommandHandler.send_error_message(
-                                        update, CUT_ERROR.format(result.error_message)
-                                    )
-                            except Exception as e:
-                                await CommandHandler.send_error_message(update, CUT_ERROR.format(str(e)))
-
-                        asyncio.create_task(download_task())
+                        CommandHandler.queue_video_job(
+                            update, context, video_link, CUT_ERROR,
+                            start_seconds=start_seconds,
+                            duration_seconds=duration_seconds
+                        )
                         return
                     except Exception as e:
                         await CommandHandler.send_error_message(update, CUT_ERROR.format(str(e)))
@@ -205,26 +312,22 @@ class Commands:
 
                 # No end time, ask for it
                 reply = await update.message.reply_text(ENTER_END_TIME)
-                context.user_data['video_link'] = video_link
-                context.user_data['start_time'] = start_time
-                context.user_data['reply_message_id'] = reply.message_id
+                evicted = await pending_store.add(PendingCut(
+                    chat_id=update.message.chat_id,
+                    prompt_message_id=reply.message_id,
+                    user_id=update.effective_user.id,
+                    video_link=video_link,
+                    start_time=start_time
+                ))
+                for cut in evicted:
+                    prefetcher.cancel(cut.chat_id, cut.prompt_message_id)
+                # Extract metadata while the user is typing
+                prefetcher.start(update.message.chat_id, reply.message_id, video_link)
                 return
 
             # No timestamp, just download
             await update.message.reply_text(PROCESSING_VIDEO)
-            async def download_task():
-                try:
-                    result = await VideoProcessor.download_video(update, context, video_link)
-                    if result.success:
-                        await VideoProcessor.send_or_upload_video(result.file_path, update, context)
-                    else:
-                        await CommandHandler.send_error_message(
-                            update, DOWNLOAD_ERROR.format(result.error_message)
-                        )
-                except Exception as e:
-                    await CommandHandler.send_error_message(update, DOWNLOAD_ERROR.format(str(e)))
-
-            asyncio.create_task(download_task())
+            CommandHandler.queue_video_job(update, context, video_link, DOWNLOAD_ERROR)
 
         except Exception as e:
             await CommandHandler.send_error_message(update, DOWNLOAD_ERROR.format(str(e)))
@@ -236,44 +339,46 @@ class Commands:
             if not await CommandHandler.check_auth(update):
                 return
 
-            if 'video_link' not in context.user_data:
+            # Only replies to our own prompt pin the cut; other replies count as plain messages
+            reply_to = update.message.reply_to_message
+            prompt_message_id = None
+            if (reply_to and reply_to.from_user and reply_to.from_user.id == context.bot.id
+                    and reply_to.text == ENTER_END_TIME):
+                prompt_message_id = reply_to.message_id
+
+            cut = await pending_store.resolve(
+                update.message.chat_id,
+                update.effective_user.id,
+                prompt_message_id
+            )
+            if cut is None:
+                if prompt_message_id is not None:
+                    await update.message.reply_text(PROMPT_EXPIRED)
                 return
 
-            video_link = context.user_data['video_link']
-            start_time = context.user_data['start_time']
+            video_link = cut.video_link
+            start_time = cut.start_time
             end_time = update.message.text.strip()
 
-            # Clean up stored data
-            context.user_data.clear()
-
-            start_seconds, duration_seconds = await CommandHandler.validate_cut_params(
-                str(start_time), end_time
-            )
+            try:
+                start_seconds, duration_seconds = await CommandHandler.validate_cut_params(
+                    str(start_time), end_time
+                )
+            except ValueError:
+                prefetcher.cancel(cut.chat_id, cut.prompt_message_id)
+                raise
             
             duration_formatted = CommandHandler.format_duration(duration_seconds)
             await update.message.reply_text(
                 CUTTING_VIDEO.format(start_time, end_time, duration_formatted)
             )
 
-            async def download_task():
-                try:
-                    result = await VideoProcessor.download_video(
-                        update=update,
-                        context=context,
-                        video_link=video_link,
-                        start_time=str(start_seconds),
-                        duration_seconds=duration_seconds
-                    )
-                    if result.success:
-                        await VideoProcessor.send_or_upload_video(result.file_path, update, context)
-                    else:
-                        await CommandHandler.send_error_message(
-                            update, CUT_ERROR.format(result.error_message)
-                        )
-                except Exception as e:
-                    await CommandHandler.send_error_message(update, CUT_ERROR.format(str(e)))
-
-            asyncio.create_task(download_task())
+            CommandHandler.queue_video_job(
+                update, context, video_link, CUT_ERROR,
+                start_seconds=start_seconds,
+                duration_seconds=duration_seconds,
+                prefetch_message_id=cut.prompt_message_id
+            )
 
         except Exception as e:
             await CommandHandler.send_error_message(update, CUT_ERROR.format(str(e)))
@@ -291,19 +396,7 @@ class Commands:
 
             video_link = context.args[0]
             
-            async def download_task():
-                try:
-                    result = await VideoProcessor.download_video(update, context, video_link)
-                    if result.success:
-                        await VideoProcessor.send_or_upload_video(result.file_path, update, context)
-                    else:
-                        await CommandHandler.send_error_message(
-                            update, DOWNLOAD_ERROR.format(result.error_message)
-                        )
-                except Exception as e:
-                    await CommandHandler.send_error_message(update, DOWNLOAD_ERROR.format(str(e)))
-
-            asyncio.create_task(download_task())
+            CommandHandler.queue_video_job(update, context, video_link, DOWNLOAD_ERROR)
 
         except Exception as e:
             await CommandHandler.send_error_message(update, DOWNLOAD_ERROR.format(str(e)))
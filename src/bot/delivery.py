@@ -0,0 +1,185 @@
+"""Bounded-memory streaming uploads to the Bot API and temp.sh."""
+import os
+import json
+import asyncio
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import aiohttp
+from aiohttp import payload
+from telegram.error import BadRequest, RetryAfter
+
+from config.logging import configure_logger
+from config.constants import UPLOAD_READ_TIMEOUT
+from config.tuning import get_tuning
+from .resilience import ErrorKind, TransientError
+from . import fileio
+
+logger = configure_logger(__name__)
+
+ProgressCallback = Callable[[int, int], None]
+# File path, or (file path, filename sent to the server)
+FileSpec = Union[str, Tuple[str, str]]
+
+class ByteBudget:
+    """Global ceiling on bytes read from disk but not yet handed to a socket."""
+
+    def __init__(self, limit: Optional[int] = None):
+        self._fixed_limit = limit
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def _limit(self) -> int:
+        """Ceiling; follows the tuning profile unless fixed."""
+        return self._fixed_limit or get_tuning().max_inflight_upload_bytes
+
+    async def acquire(self, size: int) -> int:
+        """Wait until size bytes fit under the ceiling.
+
+        Returns:
+            Bytes actually reserved (capped at the ceiling); pass this to release
+        """
+        size = min(size, self._limit)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight + size <= self._limit)
+            self._in_flight += size
+        return size
+
+    async def release(self, size: int) -> None:
+        """Return bytes reserved by acquire to the budget."""
+        async with self._condition:
+            self._in_flight -= size
+            self._condition.notify_all()
+
+# Global budget shared by all deliveries
+upload_budget = ByteBudget()
+
+class FilePayload(payload.Payload):
+    """File body streamed in fixed-size chunks with known length."""
+
+    def __init__(
+        self,
+        file_path: str,
+        size: int,
+        filename: Optional[str] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+        **kwargs: Any
+    ):
+        super().__init__(
+            file_path,
+            content_type='application/octet-stream',
+            filename=filename or os.path.basename(file_path),
+            **kwargs
+        )
+        self._file_path = file_path
+        self._size = size
+        self.on_progress = on_progress
+
+    async def write(self, writer) -> None:
+        file = await fileio.run_blocking(open, self._file_path, 'rb')
+        try:
+            chunk_size = get_tuning().upload_chunk_size
+            while True:
+                reserved = await upload_budget.acquire(chunk_size)
+                try:
+                    chunk = await fileio.run_blocking(file.read, chunk_size)
+                    if not chunk:
+                        break
+                    # Returns once the chunk is in the transport buffer
+                    await writer.write(chunk)
+                finally:
+                    await upload_budget.release(reserved)
+                if self.on_progress:
+                    self.on_progress(len(chunk))
+        finally:
+            await fileio.run_blocking(file.close)
+
+    def decode(self, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+        raise TypeError("File payload cannot be decoded")
+
+async def build_multipart(
+    fields: Dict[str, Any],
+    files: Dict[str, FileSpec],
+    on_progress: Optional[ProgressCallback] = None
+):
+    """Build a multipart body whose file parts are streamed from disk.
+
+    Args:
+        fields: Plain form fields; dicts/lists are JSON-encoded
+        files: Form field name to file path or (path, filename)
+        on_progress: Called with (sent, total) bytes over all file parts
+    """
+    writer = aiohttp.MultipartWriter('form-data')
+    for name, value in fields.items():
+        if value is None:
+            continue
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        elif isinstance(value, bool):
+            value = 'true' if value else 'false'
+        part = writer.append(str(value))
+        part.set_content_disposition('form-data', name=name)
+    payloads = []
+    for name, spec in files.items():
+        path, filename = (spec, os.path.basename(spec)) if isinstance(spec, str) else spec
+        size = await fileio.getsize(path)
+        payloads.append((name, filename, FilePayload(path, size, filename)))
+
+    if on_progress is not None:
+        total = sum(file_payload.size for _, _, file_payload in payloads)
+        sent = 0
+
+        def on_chunk(size: int) -> None:
+            nonlocal sent
+            sent += size
+            on_progress(sent, total)
+
+        for _, _, file_payload in payloads:
+            file_payload.on_progress = on_chunk
+
+    for name, filename, file_payload in payloads:
+        part = writer.append_payload(file_payload)
+        part.set_content_disposition('form-data', name=name, filename=filename)
+    return writer
+
+def upload_timeout():
+    """Unbounded total time, bounded stalls."""
+    return aiohttp.ClientTimeout(total=None, sock_read=UPLOAD_READ_TIMEOUT)
+
+async def call_bot_api(
+    bot,
+    method: str,
+    fields: Dict[str, Any],
+    files: Dict[str, FileSpec],
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """Call a Bot API method with files streamed from disk.
+
+    Returns:
+        The "result" object of the API response
+
+    Raises:
+        RetryAfter: When Telegram asks to slow down
+        TransientError: On server-side errors
+        BadRequest: On other API errors
+    """
+    body = await build_multipart(fields, files, on_progress)
+    async with aiohttp.ClientSession(timeout=upload_timeout()) as session:
+        async with session.post(f"{bot.base_url}/{method}", data=body) as response:
+            try:
+                data = await response.json(content_type=None)
+            except ValueError:
+                data = {'ok': False, 'description': f"HTTP {response.status}"}
+
+    if data.get('ok'):
+        return data['result']
+
+    description = data.get('description', 'Unknown error')
+    retry_after = (data.get('parameters') or {}).get('retry_after')
+    if retry_after:
+        raise RetryAfter(retry_after)
+    if response.status >= 500:
+        raise TransientError(f"{method} failed with status {response.status}: {description}")
+    if response.status == 429:
+        raise TransientError(f"{method} throttled: {description}", ErrorKind.THROTTLED)
+    raise BadRequest(description)
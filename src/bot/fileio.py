@@ -0,0 +1,49 @@
+"""Filesystem operations run off the event loop."""
+import os
+import asyncio
+import functools
+import contextvars
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar, Union
+
+from config.constants import FILE_IO_WORKERS
+
+T = TypeVar('T')
+PathLike = Union[str, Path]
+
+# Own pool: minutes-long yt-dlp calls in the default executor must not delay short file operations
+_executor = ThreadPoolExecutor(max_workers=FILE_IO_WORKERS, thread_name_prefix='fileio')
+
+async def run_blocking(func: Callable[..., T], *args: Any) -> T:
+    """Run a short blocking file operation on the file I/O pool, keeping context vars."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, func, *args))
+
+async def getsize(path: PathLike) -> int:
+    """Size of file in bytes."""
+    return await run_blocking(os.path.getsize, path)
+
+async def exists(path: PathLike) -> bool:
+    """Check whether path exists."""
+    return await run_blocking(os.path.exists, path)
+
+async def mkdir(path: PathLike) -> None:
+    """Create directory (and parents) if missing."""
+    await run_blocking(lambda: Path(path).mkdir(parents=True, exist_ok=True))
+
+async def replace(source: PathLike, target: PathLike) -> None:
+    """Atomically move source over target."""
+    await run_blocking(os.replace, source, target)
+
+async def unlink(path: PathLike) -> bool:
+    """Remove file; returns False if it did not exist."""
+    def remove() -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    return await run_blocking(remove)
@@ -0,0 +1,263 @@
+"""FFmpeg-based media post-processing."""
+import os
+import json
+import asyncio
+from typing import List, Optional, Tuple
+from dataclasses import dataclass
+
+from config.logging import configure_logger
+from config.constants import THUMBNAIL_SIZE, THUMBNAIL_OFFSET, SPLIT_SIZE_MARGIN
+from . import fileio
+
+logger = configure_logger(__name__)
+
+@dataclass
+class MediaInfo:
+    """Probed video metadata."""
+    duration: int = 0
+    width: int = 0
+    height: int = 0
+    thumbnail_path: str = ""
+
+class MediaProcessingError(Exception):
+    """FFmpeg/ffprobe invocation error."""
+    pass
+
+class MediaProcessor:
+    """Remux, probe, thumbnail and split operations."""
+
+    @staticmethod
+    async def run_tool(*args: str) -> bytes:
+        """Run ffmpeg/ffprobe and return stdout."""
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            error = stderr.decode(errors='ignore').strip()[-500:]
+            raise MediaProcessingError(f"{args[0]} exited with {process.returncode}: {error}")
+        return stdout
+
+    @staticmethod
+    def is_faststart(file_path: str) -> bool:
+        """Check whether the moov atom precedes mdat."""
+        with open(file_path, 'rb') as file:
+            while True:
+                header = file.read(8)
+                if len(header) < 8:
+                    return False
+                size = int.from_bytes(header[:4], 'big')
+                atom = header[4:8]
+                if atom == b'moov':
+                    return True
+                if atom == b'mdat':
+                    return False
+                header_size = 8
+                if size == 1:
+                    size = int.from_bytes(file.read(8), 'big')
+                    header_size = 16
+                # size 0 (box runs to end of file) or a size smaller than its own header
+                if size < header_size:
+                    return False
+                file.seek(size - header_size, os.SEEK_CUR)
+
+    @classmethod
+    async def faststart(cls, file_path: str) -> None:
+        """Remux MP4 in place so playback can start before the download ends."""
+        if await fileio.run_blocking(cls.is_faststart, file_path):
+            return
+
+        remuxed_path = f"{file_path}.faststart.mp4"
+        try:
+            await cls.run_tool(
+                'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+                '-i', file_path,
+                '-map', '0', '-c', 'copy',
+                '-movflags', '+faststart',
+                remuxed_path
+            )
+            await fileio.replace(remuxed_path, file_path)
+        finally:
+            await fileio.unlink(remuxed_path)
+
+    @classmethod
+    async def probe(cls, file_path: str) -> MediaInfo:
+        """Read duration and dimensions of the first video stream."""
+        output = await cls.run_tool(
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'stream=width,height:format=duration',
+            '-of', 'json',
+            file_path
+        )
+        data = json.loads(output or b'{}')
+        streams = data.get('streams') or [{}]
+        return MediaInfo(
+            duration=int(float(data.get('format', {}).get('duration') or 0)),
+            width=int(streams[0].get('width') or 0),
+            height=int(streams[0].get('height') or 0)
+        )
+
+    @classmethod
+    async def extract_thumbnail(cls, file_path: str, duration: int) -> str:
+        """Grab a single JPEG frame sized for Telegram thumbnails."""
+        thumbnail_path = f"{file_path}.jpg"
+        offset = min(THUMBNAIL_OFFSET, duration / 2)
+        await cls.run_tool(
+            'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+            '-ss', f"{offset:.2f}",
+            '-i', file_path,
+            '-frames:v', '1',
+            '-vf', f"scale={THUMBNAIL_SIZE}:{THUMBNAIL_SIZE}:force_original_aspect_ratio=decrease",
+            thumbnail_path
+        )
+        return thumbnail_path
+
+    @classmethod
+    async def prepare_for_streaming(cls, file_path: str) -> MediaInfo:
+        """Apply faststart and collect metadata for send_video.
+
+        Failures are logged and degrade to sending the file as is.
+        """
+        try:
+            await cls.faststart(file_path)
+        except Exception as e:
+            logger.warning(f"Faststart remux failed for {file_path}: {e}")
+
+        try:
+            info = await cls.probe(file_path)
+        except Exception as e:
+            logger.warning(f"Probe failed for {file_path}: {e}")
+            return MediaInfo()
+
+        try:
+            info.thumbnail_path = await cls.extract_thumbnail(file_path, info.duration)
+        except Exception as e:
+            logger.warning(f"Thumbnail extraction failed for {file_path}: {e}")
+
+        return info
+
+    @classmethod
+    async def duration(cls, file_path: str) -> float:
+        """Container duration in seconds."""
+        output = await cls.run_tool(
+            'ffprobe', '-v', 'error',
+            '-show_entries', 'format=duration',
+            '-of', 'csv=p=0',
+            file_path
+        )
+        return float(output.strip() or 0)
+
+    @classmethod
+    async def keyframe_times(cls, file_path: str) -> List[float]:
+        """Timestamps of video keyframes, read from packet flags without decoding."""
+        output = await cls.run_tool(
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            file_path
+        )
+        times = []
+        for line in output.decode(errors='ignore').splitlines():
+            pts_time, _, flags = line.partition(',')
+            if 'K' in flags and pts_time not in ('', 'N/A'):
+                times.append(float(pts_time))
+        return sorted(times)
+
+    @staticmethod
+    def plan_split(
+        keyframes: List[float],
+        duration: float,
+        file_size: int,
+        max_size: int
+    ) -> List[Tuple[float, Optional[float]]]:
+        """Choose keyframe-aligned (start, end) ranges below max_size at average bitrate.
+
+        Each part ends at the last keyframe that fits, or at the next one when
+        a single GOP is longer than the target. The last range has no end.
+        """
+        target = duration * max_size * SPLIT_SIZE_MARGIN / file_size
+        points = [point for point in keyframes if 0 < point < duration]
+        ranges = []
+        start = 0.0
+        index = 0
+        while duration - start > target:
+            end = None
+            while index < len(points) and points[index] <= start + target:
+                if points[index] > start:
+                    end = points[index]
+                index += 1
+            if end is None:
+                if index == len(points):
+                    break
+                end = points[index]
+                index += 1
+            ranges.append((start, end))
+            start = end
+        ranges.append((start, None))
+        return ranges
+
+    @classmethod
+    async def cut_segment(cls, file_path: str, start: float, end: Optional[float], output_path: str) -> None:
+        """Stream-copy a keyframe-aligned range into a faststart MP4."""
+        # Nudge past the keyframe so timestamp rounding cannot seek to the previous one
+        args = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y']
+        if start > 0:
+            args += ['-ss', f"{start + 0.001:.3f}"]
+        args += ['-i', file_path]
+        if end is not None:
+            args += ['-t', f"{end - start:.3f}"]
+        args += [
+            '-map', '0', '-c', 'copy',
+            '-avoid_negative_ts', 'make_zero',
+            '-movflags', '+faststart',
+            output_path
+        ]
+        await cls.run_tool(*args)
+
+    @classmethod
+    async def split(cls, file_path: str, max_size: int) -> List[str]:
+        """Split without re-encoding into consecutive parts smaller than max_size.
+
+        Parts that still exceed the limit (bitrate above average) are split
+        again. Part files are removed again if splitting fails.
+
+        Raises:
+            MediaProcessingError: If a part cannot get under the limit
+        """
+        file_size = await fileio.getsize(file_path)
+        duration = await cls.duration(file_path)
+        keyframes = await cls.keyframe_times(file_path)
+        ranges = cls.plan_split(keyframes, duration, file_size, max_size)
+        if len(ranges) < 2:
+            raise MediaProcessingError(f"No keyframes to split {file_path} below {max_size} bytes")
+
+        stem = os.path.splitext(file_path)[0]
+        parts = []
+        try:
+            for index, (start, end) in enumerate(ranges):
+                part_path = f"{stem}_part{index:03d}.mp4"
+                parts.append(part_path)
+                await cls.cut_segment(file_path, start, end, part_path)
+                if await fileio.getsize(part_path) >= max_size:
+                    parts[-1:] = await cls.split(part_path, max_size)
+                    await fileio.unlink(part_path)
+        except BaseException:
+            for part_path in parts:
+                await fileio.unlink(part_path)
+            raise
+
+        logger.info(f"Split {file_path} into {len(parts)} parts")
+        return parts
+
+    @staticmethod
+    async def cleanup(info: Optional[MediaInfo]) -> None:
+        """Remove generated thumbnail."""
+        if info and info.thumbnail_path:
+            try:
+                await fileio.unlink(info.thumbnail_path)
+            except OSError as e:
+                logger.error(f"Error deleting {info.thumbnail_path}: {e}")
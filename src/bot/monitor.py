@@ -0,0 +1,96 @@
+"""Event loop lag monitoring."""
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from typing import Dict, Optional
+
+from config.logging import configure_logger
+from config.constants import LOOP_MONITOR_INTERVAL, LOOP_LAG_THRESHOLD
+
+logger = configure_logger(__name__)
+
+class LoopLagMonitor:
+    """Measures loop stalls and logs the stack that caused them.
+
+    A coroutine on the loop updates a heartbeat; a watchdog thread notices a
+    stale heartbeat while the stall is still in progress and captures the
+    loop thread's current stack.
+    """
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self._interval = interval
+        self._threshold = threshold
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stall_reported = False
+        self.stall_count = 0
+        self.stall_max = 0.0
+        self.stall_total = 0.0
+
+    def start(self, debug: bool = False) -> None:
+        """Start heartbeat and watchdog; call from the event loop.
+
+        Args:
+            debug: Enable asyncio debug mode, which logs every callback
+                (e.g. a handler) that blocks longer than the threshold
+        """
+        loop = asyncio.get_running_loop()
+        if debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self._threshold
+            logger.warning(f"Loop debug mode on, flagging callbacks over {self._threshold:.2f}s")
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = loop.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        """Stop monitoring."""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _beat(self) -> None:
+        """Heartbeat; measures how late each wake-up is."""
+        while True:
+            expected = time.monotonic() + self._interval
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = now - expected
+            if lag >= self._threshold:
+                self.stall_count += 1
+                self.stall_total += lag
+                self.stall_max = max(self.stall_max, lag)
+                logger.warning(f"Event loop stalled for {lag:.3f}s")
+            self._stall_reported = False
+
+    def _watch(self) -> None:
+        """Watchdog thread: dump loop stack during a stall."""
+        while not self._stop.wait(self._interval):
+            stalled = time.monotonic() - self._heartbeat - self._interval
+            if stalled < self._threshold or self._stall_reported:
+                continue
+            self._stall_reported = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "unavailable"
+            logger.warning(f"Event loop blocked for {stalled:.3f}s so far, loop thread stack:\n{stack}")
+
+    def snapshot(self) -> Dict[str, float]:
+        """Stall statistics for export."""
+        return {
+            'stall_count': self.stall_count,
+            'stall_max_seconds': round(self.stall_max, 3),
+            'stall_total_seconds': round(self.stall_total, 3)
+        }
+
+# Global loop monitor instance
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,186 @@
+"""Pending cut requests awaiting an end time."""
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+
+from config.logging import configure_logger
+from config.constants import PENDING_TTL, MAX_PENDING_PER_USER
+from . import fileio
+
+logger = configure_logger(__name__)
+
+Key = Tuple[int, int]
+
+class PendingCut:
+    """Cut waiting for the user's end time, keyed by the prompt message."""
+    __slots__ = ('chat_id', 'prompt_message_id', 'user_id', 'video_link', 'start_time', 'created_at')
+
+    def __init__(
+        self,
+        chat_id: int,
+        prompt_message_id: int,
+        user_id: int,
+        video_link: str,
+        start_time: int,
+        created_at: Optional[float] = None
+    ):
+        self.chat_id = chat_id
+        self.prompt_message_id = prompt_message_id
+        self.user_id = user_id
+        self.video_link = video_link
+        self.start_time = start_time
+        self.created_at = time.time() if created_at is None else created_at
+
+    @property
+    def key(self) -> Key:
+        return self.chat_id, self.prompt_message_id
+
+class _SqliteBackend:
+    """Write-through persistence; every call runs off the event loop."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pending_cuts ("
+                "chat_id INTEGER, prompt_message_id INTEGER, user_id INTEGER, "
+                "video_link TEXT, start_time INTEGER, created_at REAL, "
+                "PRIMARY KEY (chat_id, prompt_message_id))"
+            )
+
+    def load(self, min_created_at: float) -> List[PendingCut]:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM pending_cuts WHERE created_at < ?", (min_created_at,))
+            rows = self._db.execute(
+                "SELECT chat_id, prompt_message_id, user_id, video_link, start_time, created_at "
+                "FROM pending_cuts ORDER BY created_at"
+            ).fetchall()
+        return [PendingCut(*row) for row in rows]
+
+    def save(self, cut: PendingCut) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pending_cuts VALUES (?, ?, ?, ?, ?, ?)",
+                (cut.chat_id, cut.prompt_message_id, cut.user_id,
+                 cut.video_link, cut.start_time, cut.created_at)
+            )
+
+    def delete(self, keys: List[Key]) -> None:
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM pending_cuts WHERE chat_id = ? AND prompt_message_id = ?", keys
+            )
+
+class PendingStore:
+    """Bounded, expiring store of pending cuts with optional SQLite persistence."""
+
+    def __init__(
+        self,
+        ttl: float = PENDING_TTL,
+        max_per_user: int = MAX_PENDING_PER_USER,
+        db_path: Optional[str] = None
+    ):
+        # Insertion order equals creation order, so expiry pops from the front
+        self._cuts: 'OrderedDict[Key, PendingCut]' = OrderedDict()
+        self._by_user: Dict[int, List[Key]] = {}
+        self._ttl = ttl
+        self._max_per_user = max_per_user
+        self._backend = _SqliteBackend(db_path) if db_path else None
+
+    def __len__(self) -> int:
+        return len(self._cuts)
+
+    async def load(self) -> None:
+        """Restore non-expired entries from the database."""
+        if self._backend is None:
+            return
+        cuts = await fileio.run_blocking(self._backend.load, time.time() - self._ttl)
+        for cut in cuts:
+            self._insert(cut)
+        logger.info(f"Restored {len(cuts)} pending cut(s)")
+
+    def _insert(self, cut: PendingCut) -> List[PendingCut]:
+        """Add in memory; returns entries evicted by the per-user limit."""
+        self._cuts[cut.key] = cut
+        keys = self._by_user.setdefault(cut.user_id, [])
+        keys.append(cut.key)
+        evicted = []
+        while len(keys) > self._max_per_user:
+            evicted.append(self._cuts.pop(keys.pop(0)))
+        return evicted
+
+    def _forget(self, cut: PendingCut) -> None:
+        """Remove from the per-user index."""
+        keys = self._by_user.get(cut.user_id)
+        if keys is not None:
+            if cut.key in keys:
+                keys.remove(cut.key)
+            if not keys:
+                del self._by_user[cut.user_id]
+
+    async def add(self, cut: PendingCut) -> List[PendingCut]:
+        """Store a pending cut.
+
+        Returns:
+            Older cuts of the same user evicted to stay within the limit
+        """
+        evicted = self._insert(cut)
+        if self._backend is not None:
+            await fileio.run_blocking(self._backend.save, cut)
+            if evicted:
+                await fileio.run_blocking(self._backend.delete, [old.key for old in evicted])
+        return evicted
+
+    async def resolve(
+        self,
+        chat_id: int,
+        user_id: int,
+        reply_to_message_id: Optional[int] = None
+    ) -> Optional[PendingCut]:
+        """Take the cut a reply refers to, or the user's latest in this chat.
+
+        A reply never falls back to another cut: if the prompt it refers to
+        is gone or expired, None is returned.
+        """
+        cut = None
+        if reply_to_message_id is not None:
+            cut = self._cuts.get((chat_id, reply_to_message_id))
+            if cut is not None and cut.user_id != user_id:
+                return None
+        else:
+            for key in reversed(self._by_user.get(user_id, [])):
+                if key[0] == chat_id:
+                    cut = self._cuts[key]
+                    break
+        if cut is None:
+            return None
+
+        del self._cuts[cut.key]
+        self._forget(cut)
+        if self._backend is not None:
+            await fileio.run_blocking(self._backend.delete, [cut.key])
+        if time.time() - cut.created_at > self._ttl:
+            return None
+        return cut
+
+    async def evict_expired(self) -> List[PendingCut]:
+        """Drop entries older than TTL."""
+        deadline = time.time() - self._ttl
+        expired = []
+        while self._cuts:
+            cut = next(iter(self._cuts.values()))
+            if cut.created_at >= deadline:
+                break
+            self._cuts.popitem(last=False)
+            self._forget(cut)
+            expired.append(cut)
+        if expired and self._backend is not None:
+            await fileio.run_blocking(self._backend.delete, [cut.key for cut in expired])
+        return expired
+
+# Global pending store; PENDING_DB enables persistence across restarts
+pending_store = PendingStore(db_path=os.getenv('PENDING_DB') or None)
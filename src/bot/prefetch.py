@@ -0,0 +1,74 @@
+"""Speculative metadata extraction while waiting for user input."""
+import asyncio
+import contextvars
+from typing import Any, Dict, Optional, Tuple
+
+from config.logging import configure_logger
+from config.constants import PREFETCH_TTL
+from config.video import get_extract_options
+
+logger = configure_logger(__name__)
+
+def extract_info(video_link: str) -> Dict[str, Any]:
+    """Run extractor without format processing or download (blocking)."""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL(get_extract_options()) as ydl:
+        return ydl.extract_info(video_link, download=False, process=False)
+
+class Prefetcher:
+    """Background info extraction keyed by prompt message."""
+
+    def __init__(self, ttl: float = PREFETCH_TTL):
+        self._tasks: Dict[Tuple[int, int], asyncio.Task] = {}
+        self._timers: Dict[Tuple[int, int], asyncio.TimerHandle] = {}
+        self._ttl = ttl
+
+    def start(self, chat_id: int, message_id: int, video_link: str) -> None:
+        """Start extraction; it is dropped if not taken within TTL."""
+        key = (chat_id, message_id)
+        self.cancel(chat_id, message_id)
+
+        loop = asyncio.get_running_loop()
+        job_context = contextvars.copy_context()
+        self._tasks[key] = asyncio.ensure_future(
+            loop.run_in_executor(None, lambda: job_context.run(extract_info, video_link))
+        )
+        self._timers[key] = loop.call_later(self._ttl, self._expire, key)
+        logger.info(f"Prefetch started: {video_link}")
+
+    def _expire(self, key: Tuple[int, int]) -> None:
+        """Drop prefetch nobody asked for."""
+        if key in self._tasks:
+            logger.info(f"Prefetch expired for {key}")
+            self.cancel(*key)
+
+    def cancel(self, chat_id: int, message_id: int) -> None:
+        """Cancel pending prefetch and its TTL timer."""
+        key = (chat_id, message_id)
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        task = self._tasks.pop(key, None)
+        if task and not task.done():
+            # The executor thread runs to completion, its result is discarded
+            task.cancel()
+
+    async def take(self, chat_id: int, message_id: int) -> Optional[Dict[str, Any]]:
+        """Return extracted info, waiting for it if still running."""
+        key = (chat_id, message_id)
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        task = self._tasks.pop(key, None)
+        if task is None:
+            return None
+
+        try:
+            return await task
+        except Exception as e:
+            logger.warning(f"Prefetch failed, falling back to full extraction: {e}")
+            return None
+
+# Global prefetcher instance
+prefetcher = Prefetcher()
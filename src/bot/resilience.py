@@ -0,0 +1,183 @@
+"""Error classification, retry policy and circuit breaker."""
+import re
+import time
+import random
+import asyncio
+from enum import Enum
+from typing import Awaitable, Callable, Optional, TypeVar
+from dataclasses import dataclass
+
+from config.logging import configure_logger
+from config.constants import CIRCUIT_BREAKER_CONFIG
+
+logger = configure_logger(__name__)
+
+T = TypeVar('T')
+
+class ErrorKind(Enum):
+    """Failure categories."""
+    THROTTLED = 'throttled'
+    NETWORK = 'network'
+    GEO = 'geo'
+    UNAVAILABLE = 'unavailable'
+    FFMPEG = 'ffmpeg'
+    UNKNOWN = 'unknown'
+
+TRANSIENT_KINDS = frozenset({ErrorKind.THROTTLED, ErrorKind.NETWORK})
+
+_TYPE_KINDS = {
+    'RetryAfter': ErrorKind.THROTTLED,
+    'GeoRestrictedError': ErrorKind.GEO,
+    'PostProcessingError': ErrorKind.FFMPEG,
+    'TimedOut': ErrorKind.NETWORK,
+    'NetworkError': ErrorKind.NETWORK,
+    'TimeoutError': ErrorKind.NETWORK,
+    'ConnectionError': ErrorKind.NETWORK,
+    'ClientConnectionError': ErrorKind.NETWORK,
+    'ServerDisconnectedError': ErrorKind.NETWORK,
+    'ClientPayloadError': ErrorKind.NETWORK,
+    'IncompleteRead': ErrorKind.NETWORK,
+}
+
+# Checked in order, first match wins
+_MESSAGE_KINDS = (
+    (re.compile(r'HTTP Error (403|429)|Too Many Requests|rate.?limit|Sign in to confirm you.re not a bot', re.I),
+     ErrorKind.THROTTLED),
+    (re.compile(r'not available (in|from) your (country|location)|geo.?restrict', re.I), ErrorKind.GEO),
+    (re.compile(r'Video unavailable|Private video|has been removed|This video is unavailable|'
+                r'members.only|Unsupported URL|is not a valid URL|'
+                r'Sign in to confirm your age|age.restricted|inappropriate for some users', re.I), ErrorKind.UNAVAILABLE),
+    # Client errors concern this one resource; 403/429 are throttling and matched above
+    (re.compile(r'(HTTP Error|status) 4(?!03|29)\d\d', re.I), ErrorKind.UNAVAILABLE),
+    (re.compile(r'ffmpeg|ffprobe|Postprocessing|Conversion failed', re.I), ErrorKind.FFMPEG),
+    (re.compile(r'timed? ?out|Connection (reset|refused|aborted)|Temporary failure|'
+                r'Unable to download (webpage|API page)(?!: HTTP Error 4\d\d)|HTTP Error 5\d\d|status 5\d\d|'
+                r'Name or service not known', re.I),
+     ErrorKind.NETWORK),
+)
+
+class TransientError(Exception):
+    """Explicitly retryable error carrying its kind."""
+    def __init__(self, message: str, kind: ErrorKind = ErrorKind.NETWORK):
+        super().__init__(message)
+        self.kind = kind
+
+def _error_chain(error: BaseException):
+    """Yield error and its causes, including yt-dlp wrapped exc_info."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        exc_info = getattr(error, 'exc_info', None)
+        wrapped = exc_info[1] if isinstance(exc_info, tuple) and len(exc_info) > 1 else None
+        error = wrapped or error.__cause__ or error.__context__
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """Map an exception to a failure category."""
+    chain = list(_error_chain(error))
+
+    for item in chain:
+        kind = getattr(item, 'kind', None)
+        if isinstance(kind, ErrorKind):
+            return kind
+        for cls in type(item).__mro__:
+            if cls.__name__ in _TYPE_KINDS:
+                return _TYPE_KINDS[cls.__name__]
+
+    message = " | ".join(str(item) for item in chain)
+    for pattern, kind in _MESSAGE_KINDS:
+        if pattern.search(message):
+            return kind
+    return ErrorKind.UNKNOWN
+
+@dataclass
+class RetryPolicy:
+    """Retry transient errors with full-jitter exponential backoff."""
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Backoff before the next attempt (0-based attempt that failed)."""
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after:
+            return float(getattr(retry_after, 'total_seconds', lambda: retry_after)())
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(
+        self,
+        func: Callable[[int], Awaitable[T]],
+        description: str = "operation"
+    ) -> T:
+        """Call func(attempt) until it succeeds or fails permanently.
+
+        Raises:
+            The last error if it is not transient or attempts are exhausted
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return await func(attempt)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in TRANSIENT_KINDS or attempt == self.max_attempts - 1:
+                    raise
+                delay = self.delay(attempt, e)
+                logger.warning(
+                    f"{description} failed ({kind.value}, attempt {attempt + 1}/{self.max_attempts}), "
+                    f"retrying in {delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+        raise RuntimeError(f"{description}: no attempts made")
+
+class CircuitBreaker:
+    """Stops new work while an upstream fails systemically."""
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_BREAKER_CONFIG['failure_threshold'],
+        reset_timeout: float = CIRCUIT_BREAKER_CONFIG['reset_timeout']
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the breaker tripped and the cool-down is running."""
+        return self._failures >= self._failure_threshold and self.remaining() > 0
+
+    def remaining(self) -> float:
+        """Seconds until the next trial request is allowed."""
+        if self._failures < self._failure_threshold:
+            return 0.0
+        return max(0.0, self._opened_at + self._reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Check whether new work may start; lets one trial through per cool-down."""
+        if self._failures < self._failure_threshold:
+            return True
+        if self.remaining() > 0:
+            return False
+        self._opened_at = time.monotonic()
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        if self._failures >= self._failure_threshold:
+            logger.info("Circuit breaker closed")
+        self._failures = 0
+
+    def record_failure(self, kind: ErrorKind) -> None:
+        """Count systemic failures; per-video errors are ignored."""
+        if kind not in TRANSIENT_KINDS:
+            return
+        self._failures += 1
+        if self._failures == self._failure_threshold:
+            self._opened_at = time.monotonic()
+            logger.warning(f"Circuit breaker opened for {self._reset_timeout:.0f}s after {kind.value} errors")
+        elif self._failures > self._failure_threshold:
+            self._opened_at = time.monotonic()
+
+# Global breaker for the video extractor
+extractor_breaker = CircuitBreaker()
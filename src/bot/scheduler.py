@@ -0,0 +1,160 @@
+"""Shortest-job-first scheduling of download jobs."""
+import time
+import asyncio
+import itertools
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+
+from config.logging import configure_logger
+from config.constants import (
+    DEFAULT_MEDIA_DURATION, DEFAULT_BITRATE_KBPS, DOWNLOAD_THROUGHPUT, REENCODE_SPEED
+)
+from config.tuning import get_tuning
+from .resilience import CircuitBreaker, extractor_breaker
+
+logger = configure_logger(__name__)
+
+_job_ids = itertools.count(1)
+
+@dataclass
+class Job:
+    """Queued unit of work with estimated cost in seconds."""
+    run: Callable[[], Awaitable[None]]
+    cost: float
+    on_queued: Optional[Callable[[int, float], Awaitable[None]]] = None
+    job_id: int = field(default_factory=lambda: next(_job_ids))
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: float = 0.0
+    position: int = 0
+
+def _estimate_bitrate(info: Dict[str, Any]) -> float:
+    """Approximate total bitrate (kbps) of the best mp4 video + m4a audio."""
+    video_tbr = audio_tbr = 0.0
+    for fmt in info.get('formats') or []:
+        tbr = fmt.get('tbr') or 0.0
+        if fmt.get('vcodec', 'none') != 'none' and fmt.get('ext') == 'mp4':
+            video_tbr = max(video_tbr, tbr)
+        elif fmt.get('vcodec') == 'none' and fmt.get('ext') == 'm4a':
+            audio_tbr = max(audio_tbr, tbr)
+    return (video_tbr + audio_tbr) or info.get('tbr') or DEFAULT_BITRATE_KBPS
+
+def estimate_job_cost(info: Optional[Dict[str, Any]], duration_seconds: Optional[int] = None) -> float:
+    """Estimate job processing time from metadata.
+
+    Args:
+        info: Extracted info dict, if available
+        duration_seconds: Cut duration; cuts are re-encoded at keyframes
+
+    Returns:
+        Estimated seconds to download (and re-encode) the media
+    """
+    info = info or {}
+    media_seconds = duration_seconds or info.get('duration') or DEFAULT_MEDIA_DURATION
+    size_bytes = media_seconds * _estimate_bitrate(info) * 1000 / 8
+    cost = size_bytes / DOWNLOAD_THROUGHPUT
+    if duration_seconds:
+        cost += media_seconds / REENCODE_SPEED
+    return cost
+
+class JobScheduler:
+    """Runs jobs cheapest-first with aging so large jobs still progress."""
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        aging_rate: Optional[float] = None,
+        breaker: CircuitBreaker = extractor_breaker
+    ):
+        self._pending: List[Job] = []
+        self._running: Dict[int, Job] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._fixed_max_concurrent = max_concurrent
+        self._fixed_aging_rate = aging_rate
+        self._breaker = breaker
+        self._resume_timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def _max_concurrent(self) -> int:
+        """Concurrency limit; follows the tuning profile unless fixed."""
+        return self._fixed_max_concurrent or get_tuning().max_concurrent_jobs
+
+    @property
+    def _aging_rate(self) -> float:
+        if self._fixed_aging_rate is not None:
+            return self._fixed_aging_rate
+        return get_tuning().job_aging_rate
+
+    def _priority(self, job: Job, now: float) -> float:
+        """Lower runs first; waiting lowers the effective cost."""
+        return job.cost - self._aging_rate * (now - job.submitted_at)
+
+    def submit(self, job: Job) -> None:
+        """Queue job and dispatch if capacity allows."""
+        self._pending.append(job)
+        logger.info(f"Job {job.job_id} queued, estimated cost {job.cost:.0f}s")
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        """Start cheapest pending jobs up to the concurrency limit."""
+        now = time.monotonic()
+        self._pending.sort(key=lambda job: self._priority(job, now))
+
+        while self._pending and len(self._running) < self._max_concurrent:
+            if not self._breaker.allow():
+                self._schedule_resume()
+                break
+            job = self._pending.pop(0)
+            job.started_at = now
+            self._running[job.job_id] = job
+            self._spawn(self._run(job))
+
+        self._notify_positions(now)
+
+    def _schedule_resume(self) -> None:
+        """Retry dispatch once the circuit breaker cool-down ends."""
+        if self._resume_timer is None:
+            delay = self._breaker.remaining()
+            logger.warning(f"Extractor circuit open, pausing {len(self._pending)} job(s) for {delay:.0f}s")
+
+            def resume():
+                self._resume_timer = None
+                self.dispatch()
+
+            self._resume_timer = asyncio.get_running_loop().call_later(delay, resume)
+
+    def _notify_positions(self, now: float) -> None:
+        """Report changed queue positions with ETA."""
+        backlog = self._breaker.remaining() * self._max_concurrent + sum(
+            max(0.0, job.cost - (now - job.started_at)) for job in self._running.values()
+        )
+        for position, job in enumerate(self._pending, start=1):
+            eta = backlog / self._max_concurrent
+            backlog += job.cost
+            if job.position != position and job.on_queued:
+                job.position = position
+                self._spawn(job.on_queued(position, eta))
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        """Start task and keep a reference until it finishes.
+
+        The task gets an empty context, so it does not inherit the job ID of
+        whichever job's completion triggered the dispatch.
+        """
+        task = contextvars.Context().run(asyncio.ensure_future, coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Job) -> None:
+        """Execute job and free its slot."""
+        try:
+            await job.run()
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+        finally:
+            self._running.pop(job.job_id, None)
+            logger.info(f"Job {job.job_id} finished in {time.monotonic() - job.started_at:.1f}s")
+            self.dispatch()
+
+# Global scheduler instance
+scheduler = JobScheduler()
@@ -0,0 +1,59 @@
+"""Startup timing and background warm-up."""
+import time
+import asyncio
+from typing import Dict
+from contextlib import contextmanager
+
+from config.logging import configure_logger
+
+logger = configure_logger(__name__)
+
+PROCESS_START: float = time.perf_counter()
+
+class StartupTimer:
+    """Collects durations of startup phases."""
+
+    def __init__(self):
+        self._phases: Dict[str, float] = {}
+
+    @contextmanager
+    def timed(self, phase: str):
+        """Measure a block and record it under phase name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases[phase] = time.perf_counter() - started
+
+    def since_start(self, phase: str) -> None:
+        """Record elapsed time from process start."""
+        self._phases[phase] = time.perf_counter() - PROCESS_START
+
+    def report(self, *phases: str) -> str:
+        """Format selected (or all) phases for logging."""
+        names = phases or tuple(self._phases)
+        return ", ".join(
+            f"{name} {self._phases[name]:.3f}s" for name in names if name in self._phases
+        )
+
+# Global startup timer instance
+startup_timer = StartupTimer()
+
+def _load_downloader() -> None:
+    """Import heavy download modules and build the extractor registry."""
+    with startup_timer.timed('yt_dlp import'):
+        import yt_dlp
+    with startup_timer.timed('aiohttp import'):
+        import aiohttp  # noqa: F401
+    with startup_timer.timed('extractors'):
+        # Instance is discarded: options are per job, the loaded extractor classes are cached
+        yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True})
+
+async def warm_up() -> None:
+    """Preload downloader modules off the event loop after polling starts."""
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _load_downloader)
+        logger.info(f"Warm-up done: {startup_timer.report('yt_dlp import', 'aiohttp import', 'extractors')}")
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
@@ -1,67 +1,133 @@
 """Progress tracking and time conversion utilities."""
 import time
 import re
-from typing import Dict, Any, Tuple
-from dataclasses import dataclass
-from queue import Queue
+import asyncio
+from typing import Dict, Any, Optional, Tuple
 
-from telegram import Update
 from telegram.ext import Application
-from tqdm import tqdm
 
 from config.logging import configure_logger
-from config.constants import PROGRESS_UPDATE_INTERVAL, PROGRESS_QUEUE_SIZE
+from config.constants import PROGRESS_SMOOTHING
+from config.tuning import get_tuning
 
 logger = configure_logger(__name__)
 
-@dataclass
-class ProgressUpdate:
-    """Progress update data."""
-    chat_id: int
-    message_id: int
-    text: str
-    timestamp: float
+PHASE_DOWNLOAD = 'Download'
+PHASE_PROCESSING = 'Processing'
+PHASE_UPLOAD = 'Upload'
+
+class JobProgress:
+    """Numeric progress of one job; only touched on the event loop."""
+    __slots__ = (
+        'phase', 'done', 'total', 'speed', 'eta',
+        'updated_at', 'text', 'sent_text', 'sent_at'
+    )
+
+    def __init__(self):
+        self.phase = PHASE_DOWNLOAD
+        self.done = 0
+        self.total = 0
+        self.speed = 0.0
+        self.eta = 0.0
+        self.updated_at = 0.0
+        self.text = ''
+        self.sent_text = ''
+        self.sent_at = 0.0
+
+class ProgressReporter:
+    """Thread-side handle that forwards throttled samples to the loop."""
+    __slots__ = ('_loop', '_manager', '_key', '_next_handoff', '_handoff_interval')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, manager: 'ProgressManager', key: Tuple[int, int]):
+        self._loop = loop
+        self._manager = manager
+        self._key = key
+        self._next_handoff = 0.0
+        self._handoff_interval = get_tuning().progress_handoff_interval
+
+    def report(self, phase: str, done: int = 0, total: int = 0, speed: Optional[float] = None,
+               force: bool = False) -> None:
+        """Record a sample; safe to call from any thread."""
+        now = time.monotonic()
+        if not force and now < self._next_handoff:
+            return
+        self._next_handoff = now + self._handoff_interval
+        self._loop.call_soon_threadsafe(self._manager.record, self._key, phase, done, total, speed, now)
 
 class ProgressManager:
-    """Manages progress update queues."""
-    def __init__(self, update_interval: float = PROGRESS_UPDATE_INTERVAL):
-        self._queues: Dict[Tuple[int, int], Queue] = {}
-        self._last_updates: Dict[Tuple[int, int], float] = {}
+    """Per-job progress records with smoothed speed and ETA."""
+    def __init__(self, update_interval: Optional[float] = None, smoothing: float = PROGRESS_SMOOTHING):
+        self._jobs: Dict[Tuple[int, int], JobProgress] = {}
         self._update_interval = update_interval
+        self._smoothing = smoothing
 
-    def get_queue(self, chat_id: int, message_id: int) -> Queue:
-        """Get or create progress queue."""
+    def register(self, chat_id: int, message_id: int) -> ProgressReporter:
+        """Start tracking a status message; call on the event loop."""
         key = (chat_id, message_id)
-        if key not in self._queues:
-            self._queues[key] = Queue(maxsize=PROGRESS_QUEUE_SIZE)
-        return self._queues[key]
-
-    def put_update(self, update: ProgressUpdate) -> None:
-        """Add rate-limited update to queue."""
-        key = (update.chat_id, update.message_id)
-        last_update = self._last_updates.get(key, 0)
-        
-        if (update.timestamp - last_update) >= self._update_interval:
-            queue = self.get_queue(update.chat_id, update.message_id)
-            try:
-                queue.put_nowait(update)
-                self._last_updates[key] = update.timestamp
-            except Queue.Full:
-                logger.warning(f"Progress queue full for {key}, skipping update")
-
-    def remove_queue(self, chat_id: int, message_id: int) -> None:
-        """Remove completed download queue."""
-        key = (chat_id, message_id)
-        self._queues.pop(key, None)
-        self._last_updates.pop(key, None)
-
-    def get_all_queues(self) -> Dict[Tuple[int, int], Queue]:
-        """Get all active progress queues."""
-        return dict(self._queues)
+        self._jobs[key] = JobProgress()
+        return ProgressReporter(asyncio.get_running_loop(), self, key)
+
+    def record(self, key: Tuple[int, int], phase: str, done: int, total: int,
+               speed: Optional[float], now: float) -> None:
+        """Apply a sample (event loop only)."""
+        job = self._jobs.get(key)
+        if job is None:
+            return
+
+        if phase != job.phase or done < job.done:
+            job.phase = phase
+            job.speed = 0.0
+        elif speed is None and job.updated_at and now > job.updated_at:
+            speed = (done - job.done) / (now - job.updated_at)
+
+        if speed:
+            job.speed = speed if not job.speed else (
+                self._smoothing * speed + (1 - self._smoothing) * job.speed
+            )
+        job.eta = (total - done) / job.speed if job.speed and total > done else 0.0
+        job.done = done
+        job.total = total
+        job.updated_at = now
+        job.text = render_progress(job)
+
+    def remove(self, chat_id: int, message_id: int) -> None:
+        """Stop tracking a status message."""
+        self._jobs.pop((chat_id, message_id), None)
+
+    def due_updates(self, now: float):
+        """Yield (chat_id, message_id, text) for changed records past the interval."""
+        interval = self._update_interval or get_tuning().progress_update_interval
+        for (chat_id, message_id), job in list(self._jobs.items()):
+            if job.text and job.text != job.sent_text and now - job.sent_at >= interval:
+                job.sent_text = job.text
+                job.sent_at = now
+                yield chat_id, message_id, job.text
 
 # Global progress manager instance
 progress_manager = ProgressManager()
 
+def _format_bytes(size: float) -> str:
+    """Human-readable byte count."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def render_progress(job: JobProgress) -> str:
+    """Status message text for a progress record."""
+    if job.total:
+        text = f"{job.phase}: {job.done / job.total * 100:.1f}% of {_format_bytes(job.total)}"
+    elif job.done:
+        text = f"{job.phase}: {_format_bytes(job.done)}"
+    else:
+        return f"{job.phase}..."
+    if job.speed:
+        text += f", {_format_bytes(job.speed)}/s"
+    if job.eta:
+        text += f", ETA {int(job.eta) // 60}:{int(job.eta) % 60:02d}"
+    return text
+
 def extract_timestamp_from_url(url: str) -> int:
     """Extract timestamp from YouTube URL."""
     try:
@@ -88,72 +154,32 @@ def convert_to_seconds(time_str: str) -> int:
     except (ValueError, TypeError) as e:
         raise ValueError("Invalid time format. Use HH:MM:SS, MM:SS, or SS.") from e
 
-class ProgressBar:
-    """Progress bar with Telegram updates."""
-    def __init__(self, total: int, update: Update, message_id: int):
-        """Initialize progress tracking."""
-        self.bar = tqdm(total=total, unit='B', unit_scale=True)
-        self.update = update
-        self.message_id = message_id
-
-    def update_progress(self, current: int) -> None:
-        """Update progress and notify Telegram."""
-        self.bar.update(current - self.bar.n)
-        
-        text = 'Upload complete.' if current == self.bar.total else f'Upload: {current / self.bar.total * 100:.2f}%'
-        progress_manager.put_update(ProgressUpdate(
-            chat_id=self.update.message.chat_id,
-            message_id=self.message_id,
-            text=text,
-            timestamp=time.time()
-        ))
-
-    def close(self) -> None:
-        """Close progress bar."""
-        self.bar.close()
-
-async def create_callback(encoder: Any, update: Update, message_id: int):
-    """Create upload progress callback."""
-    progress = ProgressBar(encoder.len, update, message_id)
-    
-    async def callback(monitor):
-        progress.update_progress(monitor.bytes_read)
-    
-    return callback
-
-def progress_hook(d: Dict[str, Any], update: Update, message_id: int) -> None:
-    """Track and report download progress."""
-    if d['status'] == 'downloading':
-        try:
-            percent = d.get('_percent_str', '').strip()
-            if percent:
-                # Remove ANSI escape codes
-                percent = re.sub(r'\x1b\[.*?m', '', percent)
-                progress_manager.put_update(ProgressUpdate(
-                    chat_id=update.message.chat_id,
-                    message_id=message_id,
-                    text=f'Download: {percent}',
-                    timestamp=time.time()
-                ))
-        except Exception as e:
-            logger.error(f"Progress hook error: {e}")
+def progress_hook(d: Dict[str, Any], reporter: ProgressReporter) -> None:
+    """Forward yt-dlp download progress (executor thread)."""
+    status = d.get('status')
+    if status == 'downloading':
+        reporter.report(
+            PHASE_DOWNLOAD,
+            d.get('downloaded_bytes') or 0,
+            d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+            d.get('speed')
+        )
+    elif status == 'finished':
+        reporter.report(PHASE_PROCESSING, force=True)
+
+def postprocessor_hook(d: Dict[str, Any], reporter: ProgressReporter) -> None:
+    """Report merge/cut post-processing phase (executor thread)."""
+    if d.get('status') == 'started':
+        reporter.report(f"{PHASE_PROCESSING} ({d.get('postprocessor', 'ffmpeg')})", force=True)
 
 async def process_progress_updates(application: Application) -> None:
-    """Send queued progress updates to Telegram."""
-    try:
-        for (chat_id, message_id), q in progress_manager.get_all_queues().items():
-            try:
-                while not q.empty():
-                    update = q.get_nowait()
-                    try:
-                        await application.bot.edit_message_text(
-                            chat_id=update.chat_id,
-                            message_id=update.message_id,
-                            text=update.text
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to send progress update: {e}")
-            except Exception as e:
-                logger.error(f"Error processing queue for {chat_id}, {message_id}: {e}")
-    except Exception as e:
-        logger.error(f"Progress update processing error: {e}")
+    """Send changed progress texts to Telegram."""
+    for chat_id, message_id, text in progress_manager.due_updates(time.monotonic()):
+        try:
+            await application.bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text
+            )
+        except Exception as e:
+            logger.error(f"Failed to send progress update: {e}")
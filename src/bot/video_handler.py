@@ -1,27 +1,57 @@
 """Video download and processing operations."""
 import os
 import asyncio
-import yt_dlp
-import aiohttp
-from typing import Optional
+import threading
+import contextvars
+from typing import Any, Callable, Dict, List, Optional
 from pathlib import Path
 from dataclasses import dataclass
 
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from config.logging import configure_logger
-from config.constants import TEMP_DIR, MAX_DIRECT_UPLOAD_SIZE, UPLOAD_CONFIG
-from config.video import get_download_options
-from .utils import progress_hook, progress_manager, convert_to_seconds
+from config.logging import configure_logger, job_id_var
+from config.constants import (
+    TEMP_DIR, UPLOAD_CONFIG, PREVIEW_CAPTION, PART_CAPTION, MEDIA_GROUP_SIZE
+)
+from config.tuning import get_tuning
+from config.video import VideoFormat, get_download_options
+from .utils import (
+    progress_hook, postprocessor_hook, progress_manager, convert_to_seconds,
+    PHASE_PROCESSING, PHASE_UPLOAD
+)
+from . import fileio
+from .media import MediaProcessor
+from .resilience import (
+    ErrorKind, RetryPolicy, TransientError, classify_error, extractor_breaker
+)
 
 logger = configure_logger(__name__)
 
+def upload_retry() -> RetryPolicy:
+    """Upload retry policy from the active tuning profile."""
+    tuning = get_tuning()
+    return RetryPolicy(
+        max_attempts=tuning.upload_max_retries,
+        base_delay=tuning.upload_retry_delay,
+        max_delay=tuning.upload_max_retry_delay
+    )
+
+def download_retry() -> RetryPolicy:
+    """Download retry policy from the active tuning profile."""
+    tuning = get_tuning()
+    return RetryPolicy(
+        max_attempts=tuning.download_max_retries,
+        base_delay=tuning.download_retry_delay,
+        max_delay=tuning.download_max_retry_delay
+    )
+
 @dataclass
 class VideoProcessingResult:
     """Operation result with status and details."""
     success: bool
     file_path: str = ""
+    status_message_id: Optional[int] = None
     error_message: str = ""
 
 class VideoProcessingError(Exception):
@@ -32,13 +62,17 @@ class UploadError(VideoProcessingError):
     """Video upload error."""
     pass
 
+class PartialDeliveryError(UploadError):
+    """Some parts already reached the chat; a fallback would duplicate them."""
+    pass
+
 class VideoProcessor:
     """Video processing operations."""
     
     @staticmethod
-    def ensure_temp_dir() -> None:
+    async def ensure_temp_dir() -> None:
         """Create temp directory if not exists."""
-        Path(TEMP_DIR).mkdir(exist_ok=True)
+        await fileio.mkdir(TEMP_DIR)
 
     @staticmethod
     def generate_temp_filename(user_id: int) -> str:
@@ -52,49 +86,272 @@ class VideoProcessor:
         return str(Path(TEMP_DIR) / filename)
 
     @staticmethod
-    def cleanup_temp_file(filepath: str) -> None:
+    async def cleanup_temp_file(filepath: str) -> None:
         """Remove temporary file."""
         try:
-            file = Path(filepath)
-            if file.exists():
-                file.unlink()
-                logger.info(f"Removed temp file: {file}")
+            if await fileio.unlink(filepath):
+                logger.info(f"Removed temp file: {filepath}")
         except Exception as e:
             logger.error(f"Error deleting {filepath}: {e}")
 
     @staticmethod
     async def upload_to_tempsh(
         file_path: str,
-        update: Update
+        update: Update,
+        on_progress: Optional[Callable[[int, int], None]] = None
     ) -> str:
         """Upload file to temp.sh and return download URL."""
+        import aiohttp
+        from .delivery import build_multipart, upload_timeout
+
         await update.message.reply_text('Upload started...')
         
-        async with aiohttp.ClientSession() as session:
-            with open(file_path, 'rb') as file:
-                data = aiohttp.FormData()
-                data.add_field('file', file, filename='video.mp4')
-                
-                for attempt in range(UPLOAD_CONFIG['max_retries']):
-                    try:
-                        async with session.post(UPLOAD_CONFIG['upload_url'], data=data) as response:
-                            if response.status == 200:
-                                upload_url = await response.text()
-                                logger.info(f"Upload successful: {upload_url}")
-                                return upload_url
-                            elif response.status == 502 and attempt < UPLOAD_CONFIG['max_retries'] - 1:
-                                logger.warning(f"Upload failed (attempt {attempt + 1})")
-                                await asyncio.sleep(UPLOAD_CONFIG['retry_delay'])
-                            else:
-                                raise UploadError(f"Upload failed with status {response.status}")
-                    except Exception as e:
-                        if attempt < UPLOAD_CONFIG['max_retries'] - 1:
-                            logger.warning(f"Upload error (attempt {attempt + 1}): {e}")
-                            await asyncio.sleep(UPLOAD_CONFIG['retry_delay'])
-                        else:
-                            raise UploadError(f"Upload failed after {UPLOAD_CONFIG['max_retries']} attempts: {e}")
-        
-        raise UploadError("Upload failed: maximum retries exceeded")
+        async with aiohttp.ClientSession(timeout=upload_timeout()) as session:
+            async def attempt_upload(_: int) -> str:
+                # Fresh body per attempt, a consumed stream cannot be resent
+                data = await build_multipart({}, {'file': (file_path, 'video.mp4')}, on_progress)
+                async with session.post(UPLOAD_CONFIG['upload_url'], data=data) as response:
+                    if response.status == 200:
+                        upload_url = await response.text()
+                        logger.info(f"Upload successful: {upload_url}")
+                        return upload_url
+                    if response.status == 429:
+                        raise TransientError(f"Upload throttled with status {response.status}", ErrorKind.THROTTLED)
+                    if response.status >= 500:
+                        raise TransientError(f"Upload failed with status {response.status}")
+                    raise UploadError(f"Upload failed with status {response.status}")
+
+            try:
+                return await upload_retry().run(attempt_upload, description="temp.sh upload")
+            except UploadError:
+                raise
+            except Exception as e:
+                raise UploadError(f"Upload failed: {e}") from e
+
+    @classmethod
+    async def send_parts(
+        cls,
+        file_path: str,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        """Split an oversized video and deliver it as ordered media groups.
+
+        A single request cannot carry more than the direct upload limit, so
+        parts are first sent concurrently to a staging chat (UPLOAD_CACHE_CHAT_ID,
+        defaulting to the user's chat) to obtain file IDs, then grouped by
+        file ID and the staging messages are deleted.
+
+        Raises:
+            UploadError: If any part fails to upload; the others are cancelled
+            PartialDeliveryError: If a later group fails after earlier ones arrived
+            MediaProcessingError: If the video cannot be split
+        """
+        from telegram import InputMediaVideo
+        from .delivery import call_bot_api
+
+        tuning = get_tuning()
+        chat_id = update.message.chat_id
+        staging_chat_id = os.getenv('UPLOAD_CACHE_CHAT_ID') or chat_id
+        parts = await MediaProcessor.split(file_path, tuning.max_direct_upload_size)
+        sizes = [await fileio.getsize(part) for part in parts]
+        sent = [0] * len(parts)
+        semaphore = asyncio.Semaphore(tuning.split_upload_concurrency)
+        staged: List[Dict[str, Any]] = []
+
+        async def upload_part(index: int, part_path: str) -> Dict[str, Any]:
+            def part_progress(done: int, _: int) -> None:
+                sent[index] = min(done, sizes[index])
+                if on_progress:
+                    on_progress(sum(sent), sum(sizes))
+
+            async with semaphore:
+                media_info = await MediaProcessor.prepare_for_streaming(part_path)
+                try:
+                    files = {'video': part_path}
+                    if media_info.thumbnail_path:
+                        files['thumbnail'] = media_info.thumbnail_path
+
+                    async def attempt_send(_: int) -> Dict[str, Any]:
+                        return await call_bot_api(
+                            context.bot,
+                            'sendVideo',
+                            fields={
+                                'chat_id': staging_chat_id,
+                                'duration': media_info.duration or None,
+                                'width': media_info.width or None,
+                                'height': media_info.height or None,
+                                'supports_streaming': True,
+                                'disable_notification': True
+                            },
+                            files=files,
+                            on_progress=part_progress
+                        )
+
+                    message = await upload_retry().run(attempt_send, description=f"Part {index + 1} upload")
+                    staged.append(message)
+                    return message
+                finally:
+                    await MediaProcessor.cleanup(media_info)
+
+        tasks = [asyncio.create_task(upload_part(index, part)) for index, part in enumerate(parts)]
+        total = len(parts)
+        delivered = 0
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise UploadError(f"Part upload failed: {task.exception()}") from task.exception()
+
+            file_ids = [task.result()['video']['file_id'] for task in tasks]
+            for offset in range(0, total, MEDIA_GROUP_SIZE):
+                group = [
+                    InputMediaVideo(file_id, caption=PART_CAPTION.format(offset + index + 1, total), supports_streaming=True)
+                    for index, file_id in enumerate(file_ids[offset:offset + MEDIA_GROUP_SIZE])
+                ]
+                # Media groups need at least two items
+                if len(group) == 1:
+                    await context.bot.send_video(
+                        chat_id=chat_id, video=group[0].media,
+                        caption=group[0].caption, supports_streaming=True
+                    )
+                else:
+                    await context.bot.send_media_group(chat_id=chat_id, media=group)
+                delivered += len(group)
+            logger.info(f"Video sent in {total} parts to chat {chat_id}")
+        except Exception as e:
+            if delivered:
+                raise PartialDeliveryError(f"Only {delivered} of {total} parts delivered: {e}") from e
+            raise
+        finally:
+            # Stop remaining uploads after a failure; wait so every staged message is known
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for message in staged:
+                try:
+                    await context.bot.delete_message(chat_id=staging_chat_id, message_id=message['message_id'])
+                except Exception as e:
+                    logger.warning(f"Failed to delete staging message {message['message_id']}: {e}")
+            for part in parts:
+                await cls.cleanup_temp_file(part)
+
+    @staticmethod
+    def run_ydl(ydl_opts: Dict[str, Any], video_link: str, info: Optional[Dict[str, Any]] = None) -> None:
+        """Blocking yt-dlp run, from pre-extracted info when given."""
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            if info is not None:
+                ydl.process_ie_result(info, download=True)
+            else:
+                ydl.download([video_link])
+
+    @staticmethod
+    def wants_preview(info: Optional[Dict[str, Any]], duration_seconds: Optional[int] = None) -> bool:
+        """Check whether progressive delivery is on and the media is long enough."""
+        tuning = get_tuning()
+        if not tuning.progressive_delivery:
+            return False
+        duration = duration_seconds or (info or {}).get('duration') or 0
+        return duration >= tuning.preview_min_duration
+
+    @classmethod
+    async def deliver_preview(
+        cls,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        video_link: str,
+        start_seconds: Optional[int] = None,
+        duration_seconds: Optional[int] = None,
+        info: Optional[Dict[str, Any]] = None,
+        abort: Optional[threading.Event] = None
+    ) -> Optional[int]:
+        """Download and send a low-resolution preview of the same range.
+
+        Best effort: a single attempt that leaves the circuit breaker alone.
+        yt-dlp mutates info while processing, so pass a copy when the full
+        download uses the same dict. Setting abort stops the download at the
+        next progress callback and drops the preview before sending, or
+        deletes it if it lands afterwards; await the task so the files are
+        removed after the download thread has exited.
+
+        Returns:
+            Message ID of the sent preview, or None if it was not sent
+        """
+        from .delivery import call_bot_api
+
+        tuning = get_tuning()
+        await cls.ensure_temp_dir()
+        preview_path = cls.get_temp_path(f"preview_{cls.generate_temp_filename(update.effective_user.id)}")
+        abort = abort or threading.Event()
+        media_info = None
+
+        def check_abort(_: Dict[str, Any]) -> None:
+            if abort.is_set():
+                from yt_dlp.utils import DownloadCancelled
+                raise DownloadCancelled("Preview no longer needed")
+
+        try:
+            ydl_opts = get_download_options(
+                output_path=preview_path,
+                progress_hook=check_abort,
+                start_seconds=start_seconds,
+                duration_seconds=duration_seconds,
+                video_format=VideoFormat(format=tuning.preview_format, fragment_retries=tuning.fragment_retries)
+            )
+            job_context = contextvars.copy_context()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, lambda: job_context.run(cls.run_ydl, ydl_opts, video_link, info)
+            )
+            if abort.is_set():
+                logger.info(f"Preview of {video_link} no longer needed")
+                return None
+
+            if await fileio.getsize(preview_path) >= tuning.max_direct_upload_size:
+                logger.info(f"Preview of {video_link} too large, skipping")
+                return None
+
+            media_info = await MediaProcessor.prepare_for_streaming(preview_path)
+            if abort.is_set():
+                logger.info(f"Preview of {video_link} no longer needed")
+                return None
+            files = {'video': preview_path}
+            if media_info.thumbnail_path:
+                files['thumbnail'] = media_info.thumbnail_path
+            message = await call_bot_api(
+                context.bot,
+                'sendVideo',
+                fields={
+                    'chat_id': update.message.chat_id,
+                    'caption': PREVIEW_CAPTION,
+                    'duration': media_info.duration or None,
+                    'width': media_info.width or None,
+                    'height': media_info.height or None,
+                    'supports_streaming': True
+                },
+                files=files
+            )
+            if abort.is_set():
+                # The full video went out while this upload was in flight
+                await context.bot.delete_message(chat_id=update.message.chat_id, message_id=message['message_id'])
+                logger.info(f"Late preview of {video_link} deleted")
+                return None
+            logger.info(f"Preview sent to chat {update.message.chat_id}")
+            return message['message_id']
+        except Exception as e:
+            if abort.is_set():
+                logger.info(f"Preview of {video_link} aborted")
+            else:
+                logger.warning(f"Preview of {video_link} failed: {e}")
+            return None
+        finally:
+            await MediaProcessor.cleanup(media_info)
+            # Partial download leftovers when the preview was aborted
+            for path in (preview_path, f"{preview_path}.part", f"{preview_path}.ytdl"):
+                await cls.cleanup_temp_file(path)
 
     @classmethod
     async def download_video(
@@ -103,7 +360,9 @@ class VideoProcessor:
         context: ContextTypes.DEFAULT_TYPE,
         video_link: str,
         start_time: Optional[str] = None,
-        duration_seconds: Optional[int] = None
+        duration_seconds: Optional[int] = None,
+        info: Optional[Dict[str, Any]] = None,
+        status_message_id: Optional[int] = None
     ) -> VideoProcessingResult:
         """Download video using yt-dlp.
         
@@ -113,13 +372,26 @@ class VideoProcessor:
             video_link: URL of video to download
             start_time: Start time for video cutting
             duration_seconds: Duration for video cutting
+            info: Pre-extracted (unprocessed) info dict to skip extraction
+            status_message_id: Existing status message to reuse for progress
             
         Returns:
             VideoProcessingResult with download status and details
         """
-        cls.ensure_temp_dir()
-        status_message = await update.message.reply_text('Download started...')
-        message_id = status_message.message_id
+        job_id = job_id_var.get()
+        await cls.ensure_temp_dir()
+        if status_message_id is None:
+            status_message = await update.message.reply_text('Download started...')
+            message_id = status_message.message_id
+        else:
+            message_id = status_message_id
+            await context.bot.edit_message_text(
+                chat_id=update.message.chat_id,
+                message_id=message_id,
+                text='Download started...'
+            )
+
+        reporter = progress_manager.register(update.message.chat_id, message_id)
 
         try:
             temp_filename = cls.generate_temp_filename(update.effective_user.id)
@@ -132,31 +404,44 @@ class VideoProcessor:
 
             ydl_opts = get_download_options(
                 output_path=temp_video_path,
-                progress_hook=lambda d: progress_hook(d, update, message_id),
+                progress_hook=lambda d: progress_hook(d, reporter),
+                postprocessor_hook=lambda d: postprocessor_hook(d, reporter),
                 start_seconds=start_seconds,
                 duration_seconds=duration_seconds
             )
 
-            logger.info(f"Downloading: {video_link}")
+            logger.info(f"Downloading: {video_link} (job {job_id})")
             
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                lambda: yt_dlp.YoutubeDL(ydl_opts).download([video_link])
-            )
+            async def attempt_download(attempt: int) -> None:
+                # Retries re-extract (signed URLs may have expired) and resume from the .part file
+                use_info = info if attempt == 0 else None
+                job_context = contextvars.copy_context()
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(
+                    None, lambda: job_context.run(cls.run_ydl, ydl_opts, video_link, use_info)
+                )
 
+            try:
+                await download_retry().run(attempt_download, description=f"Download {video_link}")
+            except Exception as e:
+                extractor_breaker.record_failure(classify_error(e))
+                raise
+            extractor_breaker.record_success()
+
+            progress_manager.remove(update.message.chat_id, message_id)
             await context.bot.edit_message_text(
                 chat_id=update.message.chat_id,
                 message_id=message_id,
                 text='Download complete.'
             )
-            progress_manager.remove_queue(update.message.chat_id, message_id)
             
-            return VideoProcessingResult(success=True, file_path=temp_video_path)
+            return VideoProcessingResult(
+                success=True, file_path=temp_video_path, status_message_id=message_id
+            )
 
         except Exception as e:
-            progress_manager.remove_queue(update.message.chat_id, message_id)
-            error_msg = f"Download failed: {str(e)}"
+            progress_manager.remove(update.message.chat_id, message_id)
+            error_msg = f"Download failed ({classify_error(e).value}): {str(e)}"
             return VideoProcessingResult(success=False, error_message=error_msg)
 
     @classmethod
@@ -164,7 +449,9 @@ class VideoProcessor:
         cls,
         file_path: str,
         update: Update,
-        context: ContextTypes.DEFAULT_TYPE
+        context: ContextTypes.DEFAULT_TYPE,
+        status_message_id: Optional[int] = None,
+        replace_message_id: Optional[int] = None
     ) -> None:
         """Send video directly or upload to temp.sh.
         
@@ -172,22 +459,88 @@ class VideoProcessor:
             file_path: Path to video file
             update: Telegram update object
             context: Bot context
+            status_message_id: Status message to report processing/upload progress on
+            replace_message_id: Preview message to swap for this video in place
             
         Raises:
             VideoProcessingError: If sending/uploading fails
         """
+        media_info = None
+        on_progress = None
+        if status_message_id is not None:
+            reporter = progress_manager.register(update.message.chat_id, status_message_id)
+            reporter.report(PHASE_PROCESSING, force=True)
+
+            def on_progress(sent: int, total: int) -> None:
+                reporter.report(PHASE_UPLOAD, sent, total, force=sent == total)
+
         try:
-            file_size = os.path.getsize(file_path)
+            file_size = await fileio.getsize(file_path)
             
-            if file_size < MAX_DIRECT_UPLOAD_SIZE:
-                with open(file_path, 'rb') as video_file:
-                    await context.bot.send_video(
-                        chat_id=update.message.chat_id,
-                        video=video_file
+            if file_size < get_tuning().max_direct_upload_size:
+                from telegram.error import BadRequest
+                from .delivery import call_bot_api
+
+                # Oversized files skip this: parts are cut with faststart and probed on their own
+                media_info = await MediaProcessor.prepare_for_streaming(file_path)
+
+                files = {'video': file_path}
+                if media_info.thumbnail_path:
+                    files['thumbnail'] = media_info.thumbnail_path
+                video_fields = {
+                    'duration': media_info.duration or None,
+                    'width': media_info.width or None,
+                    'height': media_info.height or None,
+                    'supports_streaming': True
+                }
+
+                async def attempt_send(_: int) -> None:
+                    await call_bot_api(
+                        context.bot,
+                        'sendVideo',
+                        fields={'chat_id': update.message.chat_id, **video_fields},
+                        files=files,
+                        on_progress=on_progress
                     )
-                logger.info(f"Video sent directly to chat {update.message.chat_id}")
+
+                async def attempt_replace(_: int) -> None:
+                    media = {'type': 'video', 'media': 'attach://video', **video_fields}
+                    if 'thumbnail' in files:
+                        media['thumbnail'] = 'attach://thumbnail'
+                    await call_bot_api(
+                        context.bot,
+                        'editMessageMedia',
+                        fields={
+                            'chat_id': update.message.chat_id,
+                            'message_id': replace_message_id,
+                            'media': {key: value for key, value in media.items() if value is not None}
+                        },
+                        files=files,
+                        on_progress=on_progress
+                    )
+
+                replaced = False
+                if replace_message_id is not None:
+                    try:
+                        await upload_retry().run(attempt_replace, description="Preview replacement")
+                        replaced = True
+                        logger.info(f"Preview replaced in chat {update.message.chat_id}")
+                    except BadRequest as e:
+                        # E.g. the preview was deleted meanwhile
+                        logger.warning(f"Preview replacement failed, sending separately: {e}")
+                if not replaced:
+                    await upload_retry().run(attempt_send, description="Telegram upload")
+                    logger.info(f"Video sent directly to chat {update.message.chat_id}")
             else:
-                upload_task = asyncio.create_task(cls.upload_to_tempsh(file_path, update))
+                try:
+                    await cls.send_parts(file_path, update, context, on_progress)
+                    return
+                except PartialDeliveryError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Split delivery failed, falling back to temp.sh: {e}")
+
+                upload_task = asyncio.create_task(cls.upload_to_tempsh(file_path, update, on_progress))
                 upload_url = await upload_task
                 
                 if upload_url:
@@ -202,4 +555,7 @@ class VideoProcessor:
         except Exception as e:
             raise VideoProcessingError(f"Failed to send video: {e}")
         finally:
-            cls.cleanup_temp_file(file_path)
+            if status_message_id is not None:
+                progress_manager.remove(update.message.chat_id, status_message_id)
+            await MediaProcessor.cleanup(media_info)
+            await cls.cleanup_temp_file(file_path)
@@ -9,6 +9,8 @@ HELP_TEXT: Final = (
     "/start - Start bot\n"
     "/cut <video_link> <start_time> <end_time> - Cut video (time format: HH:MM:SS, MM:SS, or SS)\n"
     "/download <video_link> - Download video\n"
+    "/stats - Show event loop health\n"
+    "/tune [profile] - Show or switch tuning profile\n"
     "/help - Show this message"
 )
 
@@ -17,6 +19,15 @@ CUT_USAGE: Final = 'Usage: /cut <video_link> <start_time> <end_time>'
 DOWNLOAD_USAGE: Final = 'Usage: /download <video_link>'
 SELECT_COMMAND: Final = 'Select command:'
 
+STATS_TEXT: Final = (
+    "Event loop stalls: {stall_count}\n"
+    "Longest stall: {stall_max_seconds}s\n"
+    "Total stalled: {stall_total_seconds}s"
+)
+
+TUNING_TEXT: Final = "Tuning profile: {}\n{}"
+TUNING_ERROR: Final = "Tuning error: {}"
+
 # Error messages
 TIME_ERROR: Final = "Time error: {}. Use HH:MM:SS, MM:SS, or SS format."
 CUT_ERROR: Final = "Cut error: {}"
@@ -25,19 +36,80 @@ DOWNLOAD_ERROR: Final = "Download error: {}"
 # Progress messages
 CUTTING_VIDEO: Final = "Cutting video from {} to {} (Duration: {})"
 ENTER_END_TIME: Final = "Enter end time (format: HH:MM:SS, MM:SS or SS):"
+PROMPT_EXPIRED: Final = "This end time prompt has expired. Send the link again."
 PROCESSING_VIDEO: Final = "Processing video..."
+PREPARING_JOB: Final = "Preparing download..."
+JOB_QUEUED: Final = "Queued: position {}, ETA ~{}"
+PREVIEW_CAPTION: Final = "Preview, full quality on the way..."
+PART_CAPTION: Final = "Part {}/{}"
 
 # File handling
 TEMP_DIR: Final[Path] = Path("temp")
 MAX_DIRECT_UPLOAD_SIZE: Final = 50 * 1024 * 1024  # 50MB
 
+# Splitting of oversized outputs
+SPLIT_SIZE_MARGIN: Final = 0.9  # plan parts at this share of the limit, bitrate varies
+SPLIT_UPLOAD_CONCURRENCY: Final = 3
+MEDIA_GROUP_SIZE: Final = 10  # Telegram maximum per media group
+
+# Progressive delivery
+PREVIEW_MIN_DURATION: Final = 300  # seconds of media before a preview pays off
+PREVIEW_FORMAT: Final = 'worst[ext=mp4][height>=240]/worst[ext=mp4]/worst'
+
+# Streaming delivery
+UPLOAD_CHUNK_SIZE: Final = 256 * 1024  # bytes read from disk per write
+MAX_INFLIGHT_UPLOAD_BYTES: Final = 8 * 1024 * 1024  # across all deliveries
+UPLOAD_READ_TIMEOUT: Final = 120  # seconds without response data
+
+# Streaming preparation
+THUMBNAIL_SIZE: Final = 320  # Telegram thumbnail bound, px
+THUMBNAIL_OFFSET: Final = 1.0  # seconds
+
 # Upload configuration
 UPLOAD_CONFIG: Final[Dict[str, Any]] = {
     'max_retries': 3,
-    'retry_delay': 5,  # seconds
+    'retry_delay': 5,  # seconds, base of exponential backoff
+    'max_retry_delay': 60,  # seconds
     'upload_url': 'https://temp.sh/upload'
 }
 
+# Download retry configuration (transient errors only)
+DOWNLOAD_RETRY_CONFIG: Final[Dict[str, Any]] = {
+    'max_retries': 3,
+    'retry_delay': 2,  # seconds, base of exponential backoff
+    'max_retry_delay': 30  # seconds
+}
+
+# Extractor circuit breaker
+CIRCUIT_BREAKER_CONFIG: Final[Dict[str, Any]] = {
+    'failure_threshold': 5,  # consecutive throttling/network failures
+    'reset_timeout': 120  # seconds before a trial job is let through
+}
+
 # Progress update configuration
-PROGRESS_UPDATE_INTERVAL: Final = 5.0  # seconds
-PROGRESS_QUEUE_SIZE: Final = 100
+PROGRESS_UPDATE_INTERVAL: Final = 5.0  # seconds between message edits
+PROGRESS_HANDOFF_INTERVAL: Final = 0.5  # seconds between samples handed to the loop
+PROGRESS_SMOOTHING: Final = 0.3  # speed EMA weight of the newest sample
+
+# Speculative prefetch while waiting for end time
+PREFETCH_TTL: Final = 300.0  # seconds
+
+# Pending end-time prompts
+PENDING_TTL: Final = 1800.0  # seconds
+MAX_PENDING_PER_USER: Final = 5
+PENDING_EVICT_INTERVAL: Final = 60.0  # seconds
+
+# Job scheduling (shortest job first with aging)
+MAX_CONCURRENT_JOBS: Final = 2
+JOB_AGING_RATE: Final = 1.0  # estimated seconds forgiven per second waited
+DEFAULT_MEDIA_DURATION: Final = 600  # seconds, when metadata is unavailable
+DEFAULT_BITRATE_KBPS: Final = 2500
+DOWNLOAD_THROUGHPUT: Final = 5 * 1024 * 1024  # bytes per second
+REENCODE_SPEED: Final = 2.0  # media seconds re-encoded per second
+
+# Threads for off-loop file I/O, kept apart from the default executor running yt-dlp
+FILE_IO_WORKERS: Final = 4
+
+# Event loop monitoring
+LOOP_MONITOR_INTERVAL: Final = 0.5  # seconds between heartbeats
+LOOP_LAG_THRESHOLD: Final = 0.1  # seconds of lag reported as a stall
@@ -1,14 +1,29 @@
 """Logging setup and filters."""
+import os
+import re
+import copy
+import json
+import uuid
+import queue
+import atexit
 import logging
 from typing import Optional
+from contextvars import ContextVar
 from dataclasses import dataclass
 from logging import Logger, Filter
+from logging.handlers import QueueHandler, QueueListener
+
+# Correlation ID of the job being processed in the current context
+job_id_var: ContextVar[str] = ContextVar('job_id', default='-')
+
+_listener: Optional[QueueListener] = None
 
 @dataclass
 class LoggerConfig:
     """Basic logger settings."""
-    format: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format: str = '%(asctime)s - %(name)s - %(levelname)s - [%(job_id)s] %(message)s'
     level: int = logging.INFO
+    json_output: bool = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
     suppress_modules: list[str] = None
 
     def __post_init__(self):
@@ -23,45 +38,110 @@ class LoggerConfig:
 
 class LogFilter(Filter):
     """Filter for technical and debug messages."""
+    PATTERN = re.compile(
+        r"maximum number of running instances reached"
+        r"|\[ffmpeg\]"
+        r"|video:.*audio:.*subtitle:"
+        r"|frame [IPB]:"
+        r"|kb/s:"
+        r"|using cpu capabilities:"
+        r"|compatible_brands:"
+        r"|Stream #"
+    )
+
     def filter(self, record: logging.LogRecord) -> bool:
-        msg = record.getMessage()
-        return not any([
-            "maximum number of running instances reached" in msg,
-            "[ffmpeg]" in msg,
-            "video:" in msg and "audio:" in msg and "subtitle:" in msg,
-            "frame I:" in msg or "frame P:" in msg or "frame B:" in msg,
-            "kb/s:" in msg,
-            "using cpu capabilities:" in msg,
-            "compatible_brands:" in msg,
-            "Stream #" in msg
-        ])
+        return self.PATTERN.search(record.getMessage()) is None
+
+class CorrelationFilter(Filter):
+    """Attach the current job ID to every record."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.job_id = job_id_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Single-line JSON log formatter."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'job_id': getattr(record, 'job_id', '-'),
+            'message': record.getMessage()
+        }
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = self.formatException(record.exc_info)
+        if exc_text:
+            entry['exc_info'] = exc_text
+        if record.stack_info:
+            entry['stack_info'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False)
+
+class ExceptionPreservingQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message.
+
+    The stock prepare() folds the formatted traceback into msg, so the
+    listener-side formatter could not emit it as a separate field.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        # Render here while the traceback is alive; formatters use exc_text
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+def new_job_id() -> str:
+    """Generate and bind a correlation ID to the current context."""
+    job_id = uuid.uuid4().hex[:8]
+    job_id_var.set(job_id)
+    return job_id
+
+def _start_listener(config: LoggerConfig) -> None:
+    """Route root logging through a queue drained by a background thread."""
+    global _listener
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if config.json_output else logging.Formatter(config.format))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = ExceptionPreservingQueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(config.level)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
 
 def configure_logger(name: Optional[str] = None, config: Optional[LoggerConfig] = None) -> Logger:
     """Configure and return a logger instance with specified settings.
-    
+
     Args:
         name: Logger name. If None, returns root logger
         config: Logger configuration settings. If None, uses default settings
-        
+
     Returns:
         Configured logger instance
     """
     if config is None:
         config = LoggerConfig()
-        
+
     logger = logging.getLogger(name)
-    
-    if not logger.handlers:
-        logging.basicConfig(
-            format=config.format,
-            level=config.level
-        )
-        
+
+    if _listener is None:
+        _start_listener(config)
+
         # Suppress logs from specified modules
+        log_filter = LogFilter()
         for module in config.suppress_modules:
             mod_logger = logging.getLogger(module)
             mod_logger.setLevel(logging.ERROR)
-            
-            mod_logger.addFilter(LogFilter())
-    
+
+            mod_logger.addFilter(log_filter)
+
     return logger
@@ -0,0 +1,167 @@
+"""Hot-reloadable performance tuning profiles."""
+import os
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field, fields, replace
+
+from config.logging import configure_logger
+from config.video import VideoFormat, PostProcessorConfig
+from config.constants import (
+    MAX_CONCURRENT_JOBS, JOB_AGING_RATE, UPLOAD_CONFIG, DOWNLOAD_RETRY_CONFIG,
+    PROGRESS_UPDATE_INTERVAL, PROGRESS_HANDOFF_INTERVAL, MAX_DIRECT_UPLOAD_SIZE,
+    UPLOAD_CHUNK_SIZE, MAX_INFLIGHT_UPLOAD_BYTES, PREVIEW_MIN_DURATION, PREVIEW_FORMAT,
+    SPLIT_UPLOAD_CONCURRENCY
+)
+
+logger = configure_logger(__name__)
+
+@dataclass(frozen=True)
+class TuningProfile:
+    """Validated set of runtime performance knobs."""
+    max_concurrent_jobs: int = MAX_CONCURRENT_JOBS
+    job_aging_rate: float = JOB_AGING_RATE
+    video_format: str = VideoFormat.format
+    fragment_retries: int = VideoFormat.fragment_retries
+    concurrent_fragment_downloads: int = 1
+    postprocessor_args: List[str] = field(default_factory=lambda: PostProcessorConfig().args)
+    download_max_retries: int = DOWNLOAD_RETRY_CONFIG['max_retries']
+    download_retry_delay: float = DOWNLOAD_RETRY_CONFIG['retry_delay']
+    download_max_retry_delay: float = DOWNLOAD_RETRY_CONFIG['max_retry_delay']
+    upload_max_retries: int = UPLOAD_CONFIG['max_retries']
+    upload_retry_delay: float = UPLOAD_CONFIG['retry_delay']
+    upload_max_retry_delay: float = UPLOAD_CONFIG['max_retry_delay']
+    progress_update_interval: float = PROGRESS_UPDATE_INTERVAL
+    progress_handoff_interval: float = PROGRESS_HANDOFF_INTERVAL
+    max_direct_upload_size: int = MAX_DIRECT_UPLOAD_SIZE
+    upload_chunk_size: int = UPLOAD_CHUNK_SIZE
+    max_inflight_upload_bytes: int = MAX_INFLIGHT_UPLOAD_BYTES
+    progressive_delivery: bool = False
+    preview_min_duration: int = PREVIEW_MIN_DURATION
+    preview_format: str = PREVIEW_FORMAT
+    split_upload_concurrency: int = SPLIT_UPLOAD_CONCURRENCY
+
+    def __post_init__(self):
+        for item in fields(self):
+            value = getattr(self, item.name)
+            if item.type in (bool, 'bool'):
+                if not isinstance(value, bool):
+                    raise ValueError(f"{item.name} must be true or false, got {value!r}")
+            elif item.type in (int, 'int'):
+                if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                    raise ValueError(f"{item.name} must be a positive integer, got {value!r}")
+            elif item.type in (float, 'float'):
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                    raise ValueError(f"{item.name} must be a non-negative number, got {value!r}")
+                object.__setattr__(self, item.name, float(value))
+        for name in ('video_format', 'preview_format'):
+            value = getattr(self, name)
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"{name} must be a non-empty string, got {value!r}")
+        if not isinstance(self.postprocessor_args, list) or \
+                not all(isinstance(arg, str) for arg in self.postprocessor_args):
+            raise ValueError("postprocessor_args must be a list of strings")
+        if self.max_direct_upload_size > MAX_DIRECT_UPLOAD_SIZE:
+            raise ValueError(f"max_direct_upload_size must not exceed the bot API limit of {MAX_DIRECT_UPLOAD_SIZE}")
+        if self.upload_chunk_size > self.max_inflight_upload_bytes:
+            raise ValueError("upload_chunk_size must not exceed max_inflight_upload_bytes")
+        if self.progress_update_interval < self.progress_handoff_interval:
+            raise ValueError("progress_update_interval must be >= progress_handoff_interval")
+
+# Built-in named profiles as overrides of the defaults
+PROFILES: Dict[str, Dict[str, Any]] = {
+    'default': {},
+    'low-cpu': {
+        'max_concurrent_jobs': 1,
+        'split_upload_concurrency': 1,
+        'video_format': (
+            'bestvideo[ext=mp4][height<=720]+bestaudio[ext=m4a]'
+            '/best[ext=mp4][height<=720]/best'
+        ),
+        'progress_update_interval': 10.0,
+        'progress_handoff_interval': 2.0,
+        'upload_chunk_size': 128 * 1024,
+        'max_inflight_upload_bytes': 4 * 1024 * 1024,
+    },
+    'max-throughput': {
+        'max_concurrent_jobs': 4,
+        'concurrent_fragment_downloads': 4,
+        'split_upload_concurrency': 6,
+        'upload_chunk_size': 1024 * 1024,
+        'max_inflight_upload_bytes': 32 * 1024 * 1024,
+        'download_retry_delay': 1.0,
+    },
+}
+
+def _read_file(path: str) -> Dict[str, Any]:
+    """Read tuning file: {"profile": name, "profiles": {...}, "overrides": {...}}."""
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: top level must be an object")
+    return data
+
+def build_profile(name: Optional[str] = None, path: Optional[str] = None) -> Tuple[str, TuningProfile]:
+    """Resolve a profile from built-ins, tuning file and environment.
+
+    Args:
+        name: Profile name; defaults to the file's "profile", then TUNING_PROFILE
+        path: Tuning file; defaults to TUNING_FILE
+
+    Returns:
+        Resolved profile name and validated profile
+
+    Raises:
+        ValueError: On unknown profiles/keys or invalid values
+    """
+    path = path or os.getenv('TUNING_FILE')
+    data = _read_file(path) if path else {}
+
+    custom = data.get('profiles', {})
+    overrides = data.get('overrides', {})
+    if not isinstance(custom, dict) or not all(isinstance(values, dict) for values in custom.values()):
+        raise ValueError("profiles must map names to objects")
+    if not isinstance(overrides, dict):
+        raise ValueError("overrides must be an object")
+
+    profiles = {**PROFILES, **custom}
+    name = name or data.get('profile') or os.getenv('TUNING_PROFILE') or 'default'
+    if not isinstance(name, str) or name not in profiles:
+        raise ValueError(f"Unknown tuning profile '{name}', available: {', '.join(sorted(profiles))}")
+
+    values = {**profiles[name], **overrides}
+    known = {item.name for item in fields(TuningProfile)}
+    unknown = set(values) - known
+    if unknown:
+        raise ValueError(f"Unknown tuning keys: {', '.join(sorted(unknown))}")
+    return name, replace(TuningProfile(), **values)
+
+class TuningManager:
+    """Holds the active profile and swaps it in one assignment on reload.
+
+    Reloads run on the event loop thread only.
+    """
+
+    def __init__(self):
+        self._selected: Optional[str] = None
+        self.name = 'default'
+        self.current = TuningProfile()
+
+    def reload(self, name: Optional[str] = None) -> TuningProfile:
+        """Load and activate a profile; the old one stays active on error.
+
+        A name given here sticks for later reloads. Jobs already running
+        keep the values they started with.
+        """
+        resolved, profile = build_profile(name or self._selected)
+        if name:
+            self._selected = name
+        self.name, self.current = resolved, profile
+        logger.info(f"Tuning profile '{resolved}' active")
+        return profile
+
+# Global tuning manager instance
+tuning = TuningManager()
+
+def get_tuning() -> TuningProfile:
+    """Active tuning profile."""
+    return tuning.current
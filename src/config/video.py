@@ -1,7 +1,7 @@
 """YT-DLP configuration."""
+import logging
 from typing import Any, Callable, Dict, Optional, List
 from dataclasses import dataclass
-from yt_dlp.utils import download_range_func
 
 @dataclass
 class VideoFormat:
@@ -35,6 +35,7 @@ class PostProcessorConfig:
 def get_download_options(
     output_path: str,
     progress_hook: Callable[[Dict[str, Any]], None],
+    postprocessor_hook: Optional[Callable[[Dict[str, Any]], None]] = None,
     start_seconds: Optional[int] = None,
     duration_seconds: Optional[int] = None,
     video_format: Optional[VideoFormat] = None,
@@ -42,26 +43,34 @@ def get_download_options(
     post_processor_config: Optional[PostProcessorConfig] = None
 ) -> Dict[str, Any]:
     """Configure YT-DLP options for video download."""
+    # Deferred: the tuning profile takes its defaults from the dataclasses above
+    from config.tuning import get_tuning
+
+    tuning = get_tuning()
     if video_format is None:
-        video_format = VideoFormat()
+        video_format = VideoFormat(format=tuning.video_format, fragment_retries=tuning.fragment_retries)
     if extractor_config is None:
         extractor_config = ExtractorConfig()
     if post_processor_config is None:
-        post_processor_config = PostProcessorConfig()
+        post_processor_config = PostProcessorConfig(args=list(tuning.postprocessor_args))
 
     opts = {
         'format': video_format.format,
         'outtmpl': output_path,
+        'merge_output_format': 'mp4',
         'force_keyframes_at_cuts': True,
         'progress_hooks': [progress_hook],
         'force_generic_extractor': video_format.force_generic_extractor,
         'fragment_retries': video_format.fragment_retries,
+        'concurrent_fragment_downloads': tuning.concurrent_fragment_downloads,
+        'continuedl': True,
         'ignoreerrors': video_format.ignore_errors,
         'extractor_args': extractor_config.get_args(),
         'postprocessor_args': post_processor_config.args,
         # Подавление лишних логов
         'quiet': True,
         'no_warnings': True,
+        'logger': logging.getLogger('yt_dlp'),
         'ffmpeg_location': None,  # Использовать системный ffmpeg
         'ffmpeg': {
             'loglevel': 'error',  # Только ошибки от ffmpeg
@@ -69,9 +78,26 @@ def get_download_options(
         }
     }
 
+    if postprocessor_hook is not None:
+        opts['postprocessor_hooks'] = [postprocessor_hook]
+
     if start_seconds is not None and duration_seconds is not None:
+        from yt_dlp.utils import download_range_func
+
         opts['download_ranges'] = download_range_func(
             [], [[start_seconds, start_seconds + duration_seconds]]
         )
 
     return opts
+
+def get_extract_options(extractor_config: Optional[ExtractorConfig] = None) -> Dict[str, Any]:
+    """Configure YT-DLP options for metadata-only extraction."""
+    if extractor_config is None:
+        extractor_config = ExtractorConfig()
+
+    return {
+        'extractor_args': extractor_config.get_args(),
+        'quiet': True,
+        'no_warnings': True,
+        'logger': logging.getLogger('yt_dlp'),
+    }
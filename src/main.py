@@ -2,19 +2,33 @@
 """Telegram bot application."""
 import os
 import signal
-from telegram import Update
-from telegram.ext import (
-    Application, 
-    CommandHandler, 
-    CallbackQueryHandler,
-    MessageHandler,
-    filters
-)
-
-from config.logging import configure_logger
-from bot.commands import Commands
-from bot.utils import extract_timestamp_from_url
-from bot.utils import process_progress_updates
+import asyncio
+from typing import Optional
+
+from bot.startup import startup_timer, warm_up
+
+with startup_timer.timed('telegram import'):
+    from telegram import Update
+    from telegram.ext import (
+        Application, 
+        CommandHandler, 
+        CallbackQueryHandler,
+        MessageHandler,
+        TypeHandler,
+        filters
+    )
+
+with startup_timer.timed('bot import'):
+    from config.logging import configure_logger
+    from config.constants import PENDING_EVICT_INTERVAL
+    from config.tuning import tuning
+    from bot.commands import Commands
+    from bot.utils import extract_timestamp_from_url
+    from bot.utils import process_progress_updates
+    from bot.monitor import loop_monitor
+    from bot.pending import pending_store
+    from bot.prefetch import prefetcher
+    from bot.scheduler import scheduler
 
 logger = configure_logger(__name__)
 
@@ -24,7 +38,9 @@ class BotApplication:
     def __init__(self, token: str):
         """Initialize with bot token."""
         self.token = token
-        self.application = Application.builder().token(token).build()
+        self._first_update_seen = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.application = Application.builder().token(token).post_init(self._post_init).post_shutdown(self._post_shutdown).build()
         self._setup_handlers()
         self._setup_jobs()
         self._setup_signals()
@@ -36,6 +52,8 @@ class BotApplication:
             CommandHandler("help", Commands.help_command),
             CommandHandler("cut", Commands.cut),
             CommandHandler("download", Commands.download),
+            CommandHandler("stats", Commands.stats),
+            CommandHandler("tune", Commands.tune),
             CallbackQueryHandler(Commands.button),
             MessageHandler(
                 filters.TEXT & ~filters.COMMAND & filters.Regex(r'https?://(?:www\.)?youtu(?:\.be|be\.com)'),
@@ -48,6 +66,7 @@ class BotApplication:
         ]
         for handler in handlers:
             self.application.add_handler(handler)
+        self.application.add_handler(TypeHandler(Update, self._track_first_update), group=-1)
 
     def _setup_jobs(self) -> None:
         """Setup progress tracking."""
@@ -57,11 +76,39 @@ class BotApplication:
             first=1.0,
             name="progress_job"
         )
+        self.application.job_queue.run_repeating(
+            self._evict_pending_job,
+            interval=PENDING_EVICT_INTERVAL,
+            first=PENDING_EVICT_INTERVAL,
+            name="pending_evict_job"
+        )
 
     def _setup_signals(self) -> None:
         """Handle shutdown signals."""
         signal.signal(signal.SIGINT, self._shutdown_signal)
         signal.signal(signal.SIGTERM, self._shutdown_signal)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self._reload_signal)
+
+    async def _post_init(self, application: Application) -> None:
+        """Report startup timings, restore state and start background warm-up."""
+        self._loop = asyncio.get_running_loop()
+        startup_timer.since_start('ready')
+        logger.info(f"Startup: {startup_timer.report('telegram import', 'bot import', 'ready')}")
+        await pending_store.load()
+        application.create_task(warm_up())
+        loop_monitor.start(debug=os.getenv('LOOP_DEBUG', '').lower() in ('1', 'true', 'yes'))
+
+    async def _post_shutdown(self, _: Application) -> None:
+        """Stop background monitoring."""
+        loop_monitor.stop()
+
+    async def _track_first_update(self, update: Update, _) -> None:
+        """Log time from process start to the first received update."""
+        if not self._first_update_seen:
+            self._first_update_seen = True
+            startup_timer.since_start('first update')
+            logger.info(f"Time to first update: {startup_timer.report('first update')}")
 
     async def _progress_job(self, context) -> None:
         """Process progress updates."""
@@ -70,10 +117,30 @@ class BotApplication:
         except Exception as e:
             context.application.logger.error(f"Progress update error: {e}")
 
+    async def _evict_pending_job(self, _) -> None:
+        """Drop expired end-time prompts and their prefetches."""
+        for cut in await pending_store.evict_expired():
+            prefetcher.cancel(cut.chat_id, cut.prompt_message_id)
+
     def _shutdown_signal(self, signum, _) -> None:
         """Clean shutdown on system signals."""
         logger.info(f"Signal {signal.Signals(signum).name} received. Shutting down...")
 
+    def _reload_signal(self, signum, _) -> None:
+        """Reload tuning on SIGHUP; the work runs on the event loop."""
+        logger.info(f"Signal {signal.Signals(signum).name} received. Reloading tuning...")
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._reload_tuning)
+
+    def _reload_tuning(self) -> None:
+        """Re-read the tuning file and apply new concurrency to queued jobs."""
+        try:
+            tuning.reload()
+        except (OSError, ValueError) as e:
+            logger.error(f"Tuning reload failed, keeping '{tuning.name}': {e}")
+            return
+        scheduler.dispatch()
+
     def run(self) -> None:
         """Start bot polling."""
         logger.info("Bot started.")
@@ -86,6 +153,11 @@ def main() -> None:
         logger.error("Bot token not set.")
         return
 
+    try:
+        tuning.reload()
+    except (OSError, ValueError) as e:
+        logger.error(f"Tuning load failed, using defaults: {e}")
+
     bot = BotApplication(token)
     bot.run()
 